@@ -0,0 +1,440 @@
+"""
+Este script mide el tiempo de cada etapa de converter.py y plotter.py.
+
+Las etapas se ejecutan en una carpeta temporal con los archivos XLS
+del repositorio, así no se modifican los archivos compilados.
+Con --escala las entradas se multiplican para medir cómo crece cada etapa.
+
+Los resultados se guardan en un archivo JSON. Si se especifica un archivo
+base (--base), cada etapa se compara contra su tiempo anterior y el script
+termina con error si alguna es más lenta que el umbral permitido.
+
+También se pueden usar archivos XLS sintéticos (ver synthetic.py)
+con --xls para medir el pipeline con más filas o más años.
+
+Ejemplo:
+
+    python benchmark.py --salida base.json
+    python benchmark.py --base base.json --umbral 0.15
+    python benchmark.py --xls ./xls_sintetico --salida sintetico.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly
+import xlrd
+
+import converter
+import plotter
+from loader import invalidar
+from renderer import exportar_figura
+from schema import leer_csv
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def contar_filas(ruta):
+    """
+    Regresa el número de filas de un archivo CSV sin contar la cabecera.
+    """
+
+    with open(ruta, "rb") as archivo:
+        return sum(1 for _ in archivo) - 1
+
+
+def ciclos_disponibles(xls):
+    """
+    Regresa los ciclos de los archivos XLS de la carpeta especificada,
+    separados en antiguo formato (2013 y 2014) y nuevo formato.
+    """
+
+    ciclos = sorted(
+        int(archivo[:-4])
+        for archivo in os.listdir(xls)
+        if archivo.endswith(".xls") and archivo[:-4].isdigit()
+    )
+
+    return [c for c in ciclos if c <= 2014], [c for c in ciclos if c > 2014]
+
+
+def preparar_carpeta(carpeta, xls):
+    """
+    Prepara la carpeta de trabajo con los archivos XLS y los archivos auxiliares.
+    Los archivos XLS no se copian, solo se enlazan.
+    """
+
+    os.symlink(os.path.abspath(xls), os.path.join(carpeta, "xls"))
+    shutil.copytree(os.path.join(RAIZ, "assets"), os.path.join(carpeta, "assets"))
+    os.makedirs(os.path.join(carpeta, "csv"))
+
+
+def escalar_csv(escala):
+    """
+    Duplica los archivos CSV de cada ciclo para multiplicar
+    el número de filas que recibe el compilado.
+    """
+
+    for archivo in sorted(os.listdir("./csv")):
+        if not archivo.endswith(".csv") or "_" in archivo:
+            continue
+
+        for i in range(1, escala):
+            shutil.copyfile(f"./csv/{archivo}", f"./csv/{archivo[:-4]}_{i}.csv")
+
+
+def etapa_xls(ciclos, procesar, escala):
+    """
+    Convierte los archivos XLS de los ciclos especificados.
+    Con escala mayor a 1 cada archivo se convierte varias veces.
+    """
+
+    filas = 0
+
+    for ciclo in ciclos:
+        for _ in range(escala):
+            procesar(ciclo)
+
+        filas += contar_filas(f"./csv/{ciclo}.csv") * escala
+
+    return filas
+
+
+def etapa_compilar(funcion, salida):
+    """
+    Ejecuta una función de compilado y regresa las filas de su salida.
+    """
+
+    funcion()
+
+    return contar_filas(salida)
+
+
+def etapa_carga(ruta):
+    """
+    Carga un archivo compilado sin usar la caché de loader.py.
+    """
+
+    return len(leer_csv(ruta))
+
+
+def etapa_plotter(funcion, *args):
+    """
+    Ejecuta el filtrado y la agregación de una gráfica.
+    Los datasets ya están en la caché, por lo cual solo se mide el filtrado.
+    """
+
+    resultado = funcion(*args)
+
+    if isinstance(resultado, tuple):
+        return sum(len(parte) for parte in resultado)
+
+    return len(resultado)
+
+
+def etapa_exportar():
+    """
+    Crea y exporta las gráficas de main2() sin usar la caché de imágenes.
+    Requiere que Kaleido tenga acceso a Chrome.
+    """
+
+    figuras = list()
+
+    exportar_original = plotter.exportar
+    plotter.exportar = lambda fig, ruta, renderizador=None: figuras.append((fig, ruta))
+
+    try:
+        plotter.main2()
+    finally:
+        plotter.exportar = exportar_original
+
+    for fig, ruta in figuras:
+        exportar_figura(fig, ruta, "png", 1)
+
+    return len(figuras)
+
+
+def crear_etapas(escala, exportar, xls):
+    """
+    Regresa las etapas a medir en el orden en que se deben ejecutar,
+    ya que cada etapa usa los archivos que genera la anterior.
+    """
+
+    antiguo_formato, nuevo_formato = ciclos_disponibles(xls)
+
+    etapas = {
+        "xls_antiguo_formato": lambda: etapa_xls(
+            antiguo_formato, converter.procesar_archivo_antiguo_formato, escala
+        ),
+        "xls_nuevo_formato": lambda: etapa_xls(
+            nuevo_formato, converter.procesar_archivo_nuevo_formato, escala
+        ),
+        "compilar_archivos": lambda: etapa_compilar(
+            converter.compilar_archivos, "./data.csv"
+        ),
+        "compilar_totales": lambda: etapa_compilar(
+            converter.compilar_totales, "./data_total.csv"
+        ),
+        "compilar_etapas": lambda: etapa_compilar(
+            lambda: converter.compilar(["data_etapas.csv", "data_total_etapas.csv"]),
+            "./data_etapas.csv",
+        ),
+        "carga_data": lambda: etapa_carga("./data.csv"),
+        "carga_data_etapas": lambda: etapa_carga("./data_etapas.csv"),
+        "carga_data_total_etapas": lambda: etapa_carga("./data_total_etapas.csv"),
+        "plotter_comparacion": lambda: etapa_plotter(plotter.datos_comparacion),
+        "plotter_programa": lambda: etapa_plotter(plotter.datos_programa, "vacuna"),
+        "plotter_ramo": lambda: etapa_plotter(plotter.datos_ramo, "Bienestar"),
+    }
+
+    if exportar:
+        etapas["exportar"] = etapa_exportar
+
+    return etapas
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta la función varias veces y regresa sus tiempos en segundos
+    y el número de filas que procesó.
+    """
+
+    tiempos = list()
+    filas = 0
+
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    return tiempos, filas
+
+
+def ejecutar(escala=1, repeticiones=3, exportar=False, etapas=None, xls=None):
+    """
+    Ejecuta las etapas en una carpeta temporal y regresa sus resultados.
+
+    Parameters
+    ==========
+    escala : int
+        El número de veces que se multiplican las entradas.
+
+    repeticiones : int
+        El número de veces que se mide cada etapa.
+
+    exportar : bool
+        Si es True también se mide la exportación de imágenes.
+
+    etapas : list
+        Los nombres de las etapas a reportar. Si no se especifica se reportan todas.
+        Las etapas previas se ejecutan de todos modos, ya que generan sus entradas.
+
+    xls : str
+        La carpeta con los archivos XLS. Si no se especifica se usa la del repositorio.
+
+    Returns
+    =======
+    dict
+        Los metadatos de la ejecución y los tiempos de cada etapa.
+
+    """
+
+    resultados = dict()
+    directorio_original = os.getcwd()
+
+    xls = xls or os.path.join(RAIZ, "xls")
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as carpeta:
+        preparar_carpeta(carpeta, xls)
+        os.chdir(carpeta)
+
+        try:
+            for nombre, funcion in crear_etapas(escala, exportar, xls).items():
+                if nombre == "compilar_archivos" and escala > 1:
+                    escalar_csv(escala)
+
+                if nombre.startswith("plotter_"):
+                    # Cargamos los datasets una vez antes de medir.
+                    funcion()
+
+                medida = etapas is None or nombre in etapas
+
+                try:
+                    tiempos, filas = medir(funcion, repeticiones if medida else 1)
+                except Exception as e:
+                    resultados[nombre] = {"error": repr(e)}
+                    print(f"{nombre}: error {e!r}")
+                    continue
+
+                if not medida:
+                    continue
+
+                resultados[nombre] = {
+                    "mediana": statistics.median(tiempos),
+                    "minimo": min(tiempos),
+                    "tiempos": tiempos,
+                    "filas": filas,
+                }
+
+                print(f"{nombre}: {statistics.median(tiempos):.4f} s ({filas:,} filas)")
+        finally:
+            os.chdir(directorio_original)
+            invalidar()
+
+    return {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "escala": escala,
+            "xls": os.path.relpath(xls, RAIZ),
+            "repeticiones": repeticiones,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "procesadores": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "xlrd": xlrd.__version__,
+            "plotly": plotly.__version__,
+        },
+        "etapas": resultados,
+    }
+
+
+def comparar(resultados, base, umbral):
+    """
+    Compara la mediana de cada etapa contra la del archivo base.
+
+    Parameters
+    ==========
+    resultados : dict
+        Los resultados de la ejecución actual.
+
+    base : dict
+        Los resultados de referencia.
+
+    umbral : float
+        El incremento permitido, por ejemplo: 0.10 es 10% más lento.
+
+    Returns
+    =======
+    list
+        Los nombres de las etapas que superaron el umbral.
+
+    """
+
+    for llave in ("escala", "xls"):
+        if base["meta"].get(llave) != resultados["meta"][llave]:
+            print(f"Aviso: el archivo base se generó con otro valor de {llave}.")
+
+    regresiones = list()
+
+    for nombre, actual in resultados["etapas"].items():
+        anterior = base["etapas"].get(nombre)
+
+        if anterior is None or "mediana" not in anterior or "mediana" not in actual:
+            continue
+
+        cambio = actual["mediana"] / anterior["mediana"] - 1
+        actual["cambio"] = cambio
+
+        if cambio > umbral:
+            regresiones.append(nombre)
+            estado = "REGRESIÓN"
+        else:
+            estado = "ok"
+
+        print(
+            f"{nombre}: {anterior['mediana']:.4f} s -> {actual['mediana']:.4f} s ({cambio:+.1%}) {estado}"
+        )
+
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mide el tiempo de cada etapa de converter.py y plotter.py."
+    )
+
+    parser.add_argument(
+        "--escala",
+        type=int,
+        default=1,
+        help="Número de veces que se multiplican las entradas.",
+    )
+
+    parser.add_argument(
+        "--repeticiones",
+        type=int,
+        default=3,
+        help="Número de veces que se mide cada etapa.",
+    )
+
+    parser.add_argument(
+        "--etapas",
+        nargs="+",
+        help="Las etapas a reportar. Por defecto se reportan todas.",
+    )
+
+    parser.add_argument(
+        "--xls",
+        help="La carpeta con los archivos XLS, por ejemplo los de synthetic.py.",
+    )
+
+    parser.add_argument(
+        "--exportar",
+        action="store_true",
+        help="También mide la exportación de imágenes (requiere Chrome).",
+    )
+
+    parser.add_argument(
+        "--salida",
+        default="./benchmark.json",
+        help="El archivo JSON donde se guardan los resultados.",
+    )
+
+    parser.add_argument(
+        "--base",
+        help="Un archivo JSON de resultados anteriores para comparar.",
+    )
+
+    parser.add_argument(
+        "--umbral",
+        type=float,
+        default=0.10,
+        help="El incremento de tiempo permitido respecto al archivo base.",
+    )
+
+    args = parser.parse_args()
+
+    resultados = ejecutar(
+        args.escala, args.repeticiones, args.exportar, args.etapas, args.xls
+    )
+
+    regresiones = list()
+
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as archivo:
+            base = json.load(archivo)
+
+        regresiones = comparar(resultados, base, args.umbral)
+        resultados["meta"]["base"] = args.base
+        resultados["meta"]["umbral"] = args.umbral
+        resultados["regresiones"] = regresiones
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=4, ensure_ascii=False)
+
+    print("Guardado:", args.salida)
+
+    if regresiones:
+        print("Etapas más lentas que el umbral:", ", ".join(regresiones))
+        sys.exit(1)
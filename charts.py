@@ -0,0 +1,303 @@
+"""
+Este script construye las gráficas de barras de Aprobado contra Ejercido.
+
+El diseño de la gráfica (ejes, leyenda, fuentes, anotaciones y la plantilla
+de Plotly) se crea una sola vez. Cada gráfica solo reemplaza los datos,
+el título y la tabla de porcentajes.
+
+Las figuras se regresan como diccionarios, así no pasan por la validación
+de plotly.graph_objects, ya que todas sus propiedades son conocidas.
+Se pueden exportar con plotly.io.write_image(figura, ruta, validate=False).
+
+Las figuras comparten el diseño de su plantilla,
+por lo cual no deben modificarse directamente.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import plotly.io as pio
+
+
+def abreviar_cifras(valores):
+    """
+    Esta función abrevia las cifras para que los
+    textos no se desborden de las barras verticales.
+
+    Parameters
+    ==========
+    valores : numpy.ndarray
+        Las cifras a abreviar.
+
+    Returns
+    =======
+    list
+        Los textos de las cifras, por ejemplo: 9,850 - 12.5k - 420k
+
+    """
+
+    valores = np.asarray(valores, dtype="float64")
+
+    miles = valores >= 10000
+    cifras = np.where(miles, valores / 1000, valores)
+
+    formatos = np.where(valores >= 100000, ",.0f", np.where(miles, ",.1f", ",.0f"))
+    sufijos = np.where(miles, "k", "")
+
+    return [
+        f"{cifra:{formato}}{sufijo}"
+        for cifra, formato, sufijo in zip(cifras.tolist(), formatos, sufijos)
+    ]
+
+
+def tabla_porcentajes(titulo, etiquetas, numerador, denominador):
+    """
+    Crea el texto de la tabla con el porcentaje de cada fila.
+
+    Las filas con denominador 0 se muestran como ---
+
+    Parameters
+    ==========
+    titulo : str
+        El encabezado de la tabla.
+
+    etiquetas : numpy.ndarray
+        Las etiquetas de cada fila, por ejemplo: los años.
+
+    numerador : numpy.ndarray
+        Las cifras del numerador.
+
+    denominador : numpy.ndarray
+        Las cifras del denominador.
+
+    Returns
+    =======
+    str
+        La tabla con formato HTML para una anotación.
+
+    """
+
+    numerador = np.asarray(numerador, dtype="float64")
+    denominador = np.asarray(denominador, dtype="float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        porcentajes = (numerador / denominador) * 100
+
+    validos = np.isfinite(porcentajes)
+
+    filas = [
+        f"{etiqueta}: {porcentaje:,.2f}%" if valido else f"{etiqueta}: ---"
+        for etiqueta, porcentaje, valido in zip(
+            np.asarray(etiquetas).tolist(), porcentajes.tolist(), validos
+        )
+    ]
+
+    return "<br>".join([f"<b>{titulo}</b>"] + filas)
+
+
+class PlantillaBarras:
+    """
+    Diseño de las gráficas de barras anuales.
+
+    Parameters
+    ==========
+    ancho : int
+        El ancho de la imagen en pixeles.
+
+    alto : int
+        El alto de la imagen en pixeles.
+
+    fuente : str
+        El texto de la fuente de los datos.
+
+    """
+
+    def __init__(
+        self, ancho=1280, alto=720, fuente="Fuente: SHCP (Cuenta Pública 2013-2023)"
+    ):
+        # Incluimos la plantilla por defecto, ya que sin la validación
+        # Plotly no la agrega por su cuenta.
+        plantilla = pio.templates[pio.templates.default].to_plotly_json()
+
+        self.diseño = {
+            "template": plantilla,
+            "legend": {
+                "orientation": "h",
+                "itemsizing": "constant",
+                "x": 0.5,
+                "y": 1.08,
+                "xanchor": "center",
+                "yanchor": "top",
+            },
+            "showlegend": True,
+            "width": ancho,
+            "height": alto,
+            "font": {"family": "Quicksand", "color": "#FFFFFF", "size": 18},
+            "title": {"font": {"size": 24}, "x": 0.5, "y": 0.965},
+            "margin": {"t": 90, "l": 120, "r": 40, "b": 90},
+            "plot_bgcolor": "#111111",
+            "paper_bgcolor": "#282A3A",
+            "xaxis": {
+                "ticks": "outside",
+                "ticklen": 10,
+                "tickcolor": "#FFFFFF",
+                "linewidth": 2,
+                "showline": True,
+                "showgrid": True,
+                "gridwidth": 0.35,
+                "mirror": True,
+                "nticks": 15,
+            },
+            "yaxis": {
+                "ticks": "outside",
+                "zeroline": False,
+                "separatethousands": True,
+                "ticklen": 10,
+                "tickcolor": "#FFFFFF",
+                "linewidth": 2,
+                "showgrid": True,
+                "gridwidth": 0.35,
+                "showline": True,
+                "nticks": 20,
+                "mirror": True,
+            },
+        }
+
+        self.anotaciones = [
+            {
+                "x": 0.01,
+                "y": -0.14,
+                "xref": "paper",
+                "yref": "paper",
+                "xanchor": "left",
+                "yanchor": "top",
+                "text": fuente,
+            },
+            {
+                "x": 0.5,
+                "y": -0.14,
+                "xref": "paper",
+                "yref": "paper",
+                "xanchor": "center",
+                "yanchor": "top",
+                "text": "Año fiscal",
+            },
+            {
+                "x": 1.01,
+                "y": -0.14,
+                "xref": "paper",
+                "yref": "paper",
+                "xanchor": "right",
+                "yanchor": "top",
+                "text": "🧁 @lapanquecita",
+            },
+        ]
+
+        self.barra = {
+            "type": "bar",
+            "textfont": {"color": "#FFFFFF", "family": "Oswald", "size": 18},
+            "textposition": "outside",
+            "opacity": 1.0,
+        }
+
+    def figura(self, x, barras, titulo, titulo_y, tabla, pos="left"):
+        """
+        Crea la figura con los datos especificados.
+
+        Parameters
+        ==========
+        x : numpy.ndarray
+            Los valores del eje horizontal, por ejemplo: los años.
+
+        barras : list
+            Una tupla (nombre, valores, color) por cada serie de barras.
+
+        titulo : str
+            El título de la gráfica.
+
+        titulo_y : str
+            El título del eje vertical.
+
+        tabla : str
+            El texto de la tabla, ver tabla_porcentajes().
+
+        pos : str
+            La posición de la tabla: left o right.
+
+        Returns
+        =======
+        dict
+            La figura lista para exportar.
+
+        """
+
+        x = np.asarray(x)
+
+        datos = list()
+        maximo = 0.0
+
+        for nombre, valores, color in barras:
+            valores = np.asarray(valores, dtype="float64")
+
+            datos.append(
+                {
+                    **self.barra,
+                    "x": x,
+                    "y": valores,
+                    "text": abreviar_cifras(valores),
+                    "name": nombre,
+                    "marker": {"color": color, "line": {"width": 0}},
+                }
+            )
+
+            if valores.size:
+                maximo = max(maximo, float(np.nanmax(valores)))
+
+        # Acomodamos la tabla.
+        if pos == "left":
+            tabla_x = 0.02
+            tabla_xanchor = "left"
+        elif pos == "right":
+            tabla_x = 0.995
+            tabla_xanchor = "right"
+        else:
+            raise ValueError(f"Posición no soportada: {pos}")
+
+        diseño = {
+            **self.diseño,
+            "title": {**self.diseño["title"], "text": titulo},
+            "yaxis": {
+                **self.diseño["yaxis"],
+                "range": [0, maximo * 1.08],
+                "title": {"text": titulo_y, "font": {"size": 20}, "standoff": 6},
+            },
+            "annotations": [
+                {
+                    "x": tabla_x,
+                    "y": 0.92,
+                    "xref": "paper",
+                    "yref": "paper",
+                    "xanchor": tabla_xanchor,
+                    "yanchor": "top",
+                    "bordercolor": "#FFFFFF",
+                    "borderwidth": 1.5,
+                    "borderpad": 7,
+                    "bgcolor": "#111111",
+                    "align": "left",
+                    "font": {"size": 12},
+                    "text": tabla,
+                },
+                *self.anotaciones,
+            ],
+        }
+
+        return {"data": datos, "layout": diseño}
+
+
+@lru_cache(maxsize=None)
+def plantilla_barras():
+    """
+    Regresa la plantilla por defecto, se crea una sola vez por proceso.
+    """
+
+    return PlantillaBarras()
@@ -0,0 +1,441 @@
+"""
+Este script verifica la integridad de los archivos compilados
+por converter.py (data.csv y data_total.csv).
+
+Se realizan las siguientes verificaciones:
+
+1. Las sumas de cada fila: TOTAL es la suma de las columnas GC_* y GI_*.
+Si el archivo incluye GC_SUMA y GI_SUMA (por ejemplo, los CSV de cada ciclo),
+también se verifica que sean la suma de sus columnas (ver schema.SUMAS).
+
+2. La suma de los programas de data.csv es igual al total de cada
+ramo en data_total.csv (por CICLO, ENTE, RAMO y PRESUPUESTO).
+
+3. El presupuesto devengado no es mayor al modificado.
+
+Todas las verificaciones se hacen sobre columnas completas, por lo cual
+toman solo unos cuantos milisegundos después de cargar los archivos.
+Los montos se comparan en centavos enteros (ver schema.a_centavos),
+así las sumas son exactas.
+
+Ejemplo:
+
+    python checker.py
+    python checker.py --salida diferencias.csv
+    python checker.py --centavos
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import schema
+from schema import ETAPAS, a_centavos, leer_csv
+
+# Las columnas que forman cada suma. El TOTAL incluye las pensiones
+# y jubilaciones, las cuales no forman parte de GI_SUMA.
+SUMAS = {
+    **schema.SUMAS,
+    "TOTAL": schema.SUMAS["GC_SUMA"]
+    + ["GI_PENSIONES_Y_JUBILACIONES"]
+    + schema.SUMAS["GI_SUMA"],
+}
+
+LLAVE_RAMOS = ["CICLO", "ENTE", "RAMO", "PRESUPUESTO"]
+
+COLUMNAS_REPORTE = [
+    "VERIFICACION",
+    "ARCHIVO",
+    "FILA",
+    "CICLO",
+    "ENTE",
+    "RAMO",
+    "PROGRAMA",
+    "PRESUPUESTO",
+    "MEDIDA",
+    "ESPERADO",
+    "OBTENIDO",
+    "DIFERENCIA",
+]
+
+# La diferencia permitida: absoluta en pesos y relativa al valor esperado.
+TOLERANCIA = 1.0
+TOLERANCIA_RELATIVA = 1e-9
+
+
+def centavos(df, columnas):
+    """
+    Regresa los montos de las columnas como una matriz de centavos (int64).
+    Las celdas vacías se consideran 0.
+    """
+
+    return df[columnas].to_numpy(dtype="int64", na_value=0)
+
+
+def fuera_de_tolerancia(esperado, obtenido, tolerancia, relativa):
+    """
+    Regresa una máscara con las cifras cuya diferencia supera la tolerancia.
+    Las cifras están en centavos y la tolerancia absoluta en pesos.
+    """
+
+    return np.abs(obtenido - esperado) > tolerancia * 100 + relativa * np.abs(esperado)
+
+
+def diferencias(verificacion, archivo, df, medida, esperado, obtenido, mascara):
+    """
+    Crea las filas del reporte de las posiciones marcadas en la máscara.
+    Las cifras del reporte se convierten de centavos a pesos.
+    """
+
+    filas = df.loc[mascara, [c for c in COLUMNAS_REPORTE if c in df.columns]]
+
+    esperado = esperado[mascara] / 100
+    obtenido = obtenido[mascara] / 100
+
+    return filas.assign(
+        VERIFICACION=verificacion,
+        ARCHIVO=archivo,
+        FILA=filas.index,
+        MEDIDA=medida,
+        ESPERADO=esperado,
+        OBTENIDO=obtenido,
+        DIFERENCIA=obtenido - esperado,
+    )
+
+
+def verificar_sumas(df, archivo, tolerancia=TOLERANCIA, relativa=TOLERANCIA_RELATIVA):
+    """
+    Verifica que cada suma sea igual a la suma de sus columnas (ver SUMAS).
+    Las sumas que no existen en el DataFrame se omiten.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con el formato de data.csv o data_total.csv
+        y los montos en centavos.
+
+    archivo : str
+        El nombre del archivo para el reporte.
+
+    Returns
+    =======
+    list
+        Los DataFrames con las diferencias de cada suma.
+
+    """
+
+    resultados = list()
+
+    for suma, partes in SUMAS.items():
+        if suma not in df.columns:
+            continue
+
+        partes = [columna for columna in partes if columna in df.columns]
+
+        esperado = centavos(df, partes).sum(axis=1)
+        obtenido = centavos(df, [suma])[:, 0]
+
+        mascara = fuera_de_tolerancia(esperado, obtenido, tolerancia, relativa)
+
+        if mascara.any():
+            resultados.append(
+                diferencias("suma", archivo, df, suma, esperado, obtenido, mascara)
+            )
+
+    return resultados
+
+
+def verificar_conciliacion(
+    programas, totales, tolerancia=TOLERANCIA, relativa=TOLERANCIA_RELATIVA
+):
+    """
+    Verifica que la suma de los programas sea igual al total de cada ramo.
+
+    Ambos archivos se agrupan por CICLO, ENTE, RAMO y PRESUPUESTO y
+    se unen por esa llave. Las llaves que solo existen en uno de
+    los archivos también se reportan.
+
+    Parameters
+    ==========
+    programas : pandas.DataFrame
+        El DataFrame con el formato de data.csv y los montos en centavos.
+
+    totales : pandas.DataFrame
+        El DataFrame con el formato de data_total.csv y los montos en centavos.
+
+    Returns
+    =======
+    list
+        Los DataFrames con las diferencias.
+
+    """
+
+    # Convertimos las etiquetas a texto, así ambos archivos
+    # se pueden unir aunque tengan distintas categorías.
+    def agrupar(df):
+        return (
+            df.astype({columna: "str" for columna in LLAVE_RAMOS[1:]})
+            .groupby(LLAVE_RAMOS, sort=False)["TOTAL"]
+            .sum(min_count=1)
+        )
+
+    unidos = pd.merge(
+        agrupar(totales).rename("ESPERADO"),
+        agrupar(programas).rename("OBTENIDO"),
+        how="outer",
+        left_index=True,
+        right_index=True,
+    ).reset_index()
+
+    esperado = centavos(unidos, ["ESPERADO"])[:, 0]
+    obtenido = centavos(unidos, ["OBTENIDO"])[:, 0]
+
+    # Una llave que falta en uno de los archivos siempre es una diferencia.
+    mascara = (
+        fuera_de_tolerancia(esperado, obtenido, tolerancia, relativa)
+        | (unidos["ESPERADO"].isna() != unidos["OBTENIDO"].isna()).to_numpy()
+    )
+
+    if not mascara.any():
+        return list()
+
+    reporte = diferencias(
+        "conciliacion",
+        "data.csv / data_total.csv",
+        unidos,
+        "TOTAL",
+        esperado,
+        obtenido,
+        mascara,
+    )
+
+    # La fila no aplica, ya que cada diferencia es la suma de varias filas.
+    return [reporte.assign(FILA=None)]
+
+
+def verificar_etapas(df, archivo, tolerancia=TOLERANCIA, relativa=TOLERANCIA_RELATIVA):
+    """
+    Verifica que el presupuesto devengado no sea mayor al modificado.
+
+    Las filas de cada partida vienen juntas y en el orden de ETAPAS,
+    por lo cual ambas etapas se comparan sin agrupar.
+
+    Returns
+    =======
+    list
+        Los DataFrames con las diferencias.
+
+    """
+
+    presupuestos = df["PRESUPUESTO"].to_numpy(dtype="object")
+
+    if (
+        len(presupuestos) % len(ETAPAS) != 0
+        or not (presupuestos.reshape(-1, len(ETAPAS)) == ETAPAS).all()
+    ):
+        raise ValueError(f"Las filas de {archivo} no están agrupadas por partida.")
+
+    totales = centavos(df, ["TOTAL"]).reshape(-1, len(ETAPAS))
+
+    modificado = totales[:, ETAPAS.index("Modificado")]
+    devengado = totales[:, ETAPAS.index("Devengado")]
+
+    # Solo nos interesan los casos donde el devengado es mayor.
+    mascara = fuera_de_tolerancia(modificado, devengado, tolerancia, relativa) & (
+        devengado > modificado
+    )
+
+    if not mascara.any():
+        return list()
+
+    # Reportamos la fila del devengado de cada partida.
+    filas = df.iloc[ETAPAS.index("Devengado") :: len(ETAPAS)]
+
+    return [
+        diferencias(
+            "devengado_mayor_a_modificado",
+            archivo,
+            filas,
+            "TOTAL",
+            modificado,
+            devengado,
+            mascara,
+        )
+    ]
+
+
+def verificar(
+    ruta_programas="./data.csv",
+    ruta_totales="./data_total.csv",
+    tolerancia=TOLERANCIA,
+    relativa=TOLERANCIA_RELATIVA,
+    en_centavos=False,
+):
+    """
+    Realiza todas las verificaciones de los archivos compilados.
+
+    Parameters
+    ==========
+    ruta_programas : str
+        La ruta del archivo con el desglose por programa.
+
+    ruta_totales : str
+        La ruta del archivo con los totales por ramo.
+
+    tolerancia : float
+        La diferencia absoluta permitida en pesos.
+
+    relativa : float
+        La diferencia permitida relativa al valor esperado.
+
+    en_centavos : bool
+        Si es True, los archivos tienen los montos en centavos
+        (data_centavos.csv y data_total_centavos.csv).
+
+    Returns
+    =======
+    pandas.DataFrame
+        Una fila por cada diferencia encontrada, vacío si no hay diferencias.
+
+    """
+
+    if en_centavos:
+        programas = leer_csv(ruta_programas, centavos=True)
+        totales = leer_csv(ruta_totales, centavos=True)
+    else:
+        programas = a_centavos(leer_csv(ruta_programas))
+        totales = a_centavos(leer_csv(ruta_totales))
+
+    resultados = [
+        *verificar_sumas(programas, "data.csv", tolerancia, relativa),
+        *verificar_sumas(totales, "data_total.csv", tolerancia, relativa),
+        *verificar_conciliacion(programas, totales, tolerancia, relativa),
+        *verificar_etapas(programas, "data.csv", tolerancia, relativa),
+        *verificar_etapas(totales, "data_total.csv", tolerancia, relativa),
+    ]
+
+    if not resultados:
+        return pd.DataFrame(columns=COLUMNAS_REPORTE)
+
+    # Las etiquetas se convierten a texto para poder unir los reportes.
+    resultados = [
+        reporte.reindex(columns=COLUMNAS_REPORTE).astype(
+            {"ENTE": "str", "RAMO": "str", "PROGRAMA": "str", "PRESUPUESTO": "str"}
+        )
+        for reporte in resultados
+    ]
+
+    return pd.concat(resultados, ignore_index=True)
+
+
+def resumir(reporte, limite=10):
+    """
+    Imprime el número de diferencias de cada verificación
+    y las diferencias más grandes.
+    """
+
+    if reporte.empty:
+        print("Sin diferencias.")
+        return
+
+    conteo = reporte.groupby(["VERIFICACION", "ARCHIVO", "MEDIDA"]).size()
+
+    print("Diferencias encontradas:")
+    print(conteo.to_string())
+
+    mayores = reporte.reindex(
+        reporte["DIFERENCIA"].abs().sort_values(ascending=False).index
+    ).head(limite)
+
+    print()
+    print(
+        mayores[
+            [
+                "VERIFICACION",
+                "ARCHIVO",
+                "CICLO",
+                "RAMO",
+                "PROGRAMA",
+                "PRESUPUESTO",
+                "MEDIDA",
+                "DIFERENCIA",
+            ]
+        ].to_string(index=False)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Verifica la integridad de los archivos compilados."
+    )
+
+    parser.add_argument(
+        "--programas",
+        help="El archivo con el desglose por programa.",
+    )
+
+    parser.add_argument(
+        "--totales",
+        help="El archivo con los totales por ramo.",
+    )
+
+    parser.add_argument(
+        "--centavos",
+        action="store_true",
+        help="Verifica los archivos con los montos en centavos.",
+    )
+
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=TOLERANCIA,
+        help="La diferencia absoluta permitida en pesos.",
+    )
+
+    parser.add_argument(
+        "--relativa",
+        type=float,
+        default=TOLERANCIA_RELATIVA,
+        help="La diferencia permitida relativa al valor esperado.",
+    )
+
+    parser.add_argument(
+        "--salida",
+        help="Guarda todas las diferencias en este archivo CSV.",
+    )
+
+    parser.add_argument(
+        "--mostrar",
+        type=int,
+        default=10,
+        help="El número de diferencias más grandes que se muestran.",
+    )
+
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+
+    sufijo = "_centavos" if args.centavos else ""
+
+    reporte = verificar(
+        args.programas or f"./data{sufijo}.csv",
+        args.totales or f"./data_total{sufijo}.csv",
+        args.tolerancia,
+        args.relativa,
+        args.centavos,
+    )
+
+    resumir(reporte, args.mostrar)
+
+    print(f"\nVerificación terminada en {time.perf_counter() - inicio:.3f} s")
+
+    if args.salida:
+        reporte.to_csv(args.salida, index=False, encoding="utf-8")
+        print("Guardado:", args.salida)
+
+    # Terminamos con error para detener la publicación de los archivos.
+    if not reporte.empty:
+        sys.exit(1)
@@ -0,0 +1,162 @@
+"""
+Este script guarda y carga la base de datos de Cuenta Pública
+en un formato columnar binario.
+
+Cada columna se guarda en su propio archivo .npy de ancho fijo.
+Las columnas de etiquetas se guardan como códigos enteros y sus
+categorías se guardan en el archivo de esquema.
+
+Al cargar el dataset los archivos se mapean en memoria,
+por lo cual no es necesario leer ni copiar su contenido.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import schema
+
+VERSION_ESQUEMA = 1
+
+# El ciclo también se guarda como código, ya que solo tiene unos cuantos valores.
+COLUMNAS_ETIQUETA = ["CICLO"] + schema.COLUMNAS_ETIQUETA
+
+
+def guardar_columnar(df, ruta):
+    """
+    Guarda el DataFrame en formato columnar en la carpeta especificada.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con las columnas de data.csv
+
+    ruta : str
+        La carpeta donde se guardarán los archivos.
+
+    """
+
+    # Los archivos se escriben en una carpeta nueva y después se reemplaza
+    # la anterior. Así los procesos que aún tienen mapeados los archivos
+    # anteriores no leen archivos a medio escribir ni más cortos, y la carpeta
+    # solo contiene las columnas del esquema.
+    destino = os.path.normpath(ruta)
+    ruta = f"{destino}.nuevo-{os.getpid()}"
+
+    shutil.rmtree(ruta, ignore_errors=True)
+    os.makedirs(ruta)
+
+    esquema = {"version": VERSION_ESQUEMA, "filas": len(df), "columnas": list()}
+
+    for columna in df.columns:
+        archivo = f"{columna}.npy"
+
+        if columna in COLUMNAS_ETIQUETA:
+            categorias = pd.Categorical(df[columna]).remove_unused_categories()
+
+            # Usamos el entero más pequeño que pueda guardar todos los códigos.
+            codigos = categorias.codes.astype(
+                np.min_scalar_type(-max(len(categorias.categories), 1))
+            )
+
+            np.save(f"{ruta}/{archivo}", codigos)
+
+            esquema["columnas"].append(
+                {
+                    "nombre": columna,
+                    "tipo": "categoria",
+                    "archivo": archivo,
+                    "categorias": categorias.categories.tolist(),
+                }
+            )
+        else:
+            # Las celdas vacías o con texto se guardan como NaN.
+            valores = pd.to_numeric(df[columna], errors="coerce").to_numpy(
+                dtype="float64"
+            )
+
+            np.save(f"{ruta}/{archivo}", valores)
+
+            esquema["columnas"].append(
+                {"nombre": columna, "tipo": "float64", "archivo": archivo}
+            )
+
+    # El esquema se escribe al final, así un dataset incompleto no se puede cargar.
+    with open(f"{ruta}/esquema.json", "w", encoding="utf-8") as archivo:
+        json.dump(esquema, archivo, ensure_ascii=False, indent=4)
+
+    reemplazar_carpeta(ruta, destino)
+
+
+def reemplazar_carpeta(origen, destino):
+    """
+    Reemplaza la carpeta destino por la carpeta origen.
+
+    Un directorio con archivos no se puede reemplazar directamente,
+    así que el anterior primero se mueve a otro nombre y después se borra.
+    Los procesos que lo tengan mapeado en memoria lo siguen leyendo
+    hasta que vuelvan a cargar el dataset.
+    """
+
+    anterior = f"{destino}.anterior-{os.getpid()}"
+
+    if os.path.exists(destino):
+        shutil.rmtree(anterior, ignore_errors=True)
+        os.replace(destino, anterior)
+
+    os.replace(origen, destino)
+
+    if os.path.exists(anterior):
+        # En Windows no se pueden borrar los archivos que siguen mapeados.
+        shutil.rmtree(anterior, ignore_errors=True)
+
+
+def cargar_columnar(ruta, columnas=None):
+    """
+    Carga el dataset columnar de la carpeta especificada.
+
+    Los arreglos se mapean en memoria de solo lectura y el DataFrame
+    se construye sobre ellos sin copiarlos.
+
+    Parameters
+    ==========
+    ruta : str
+        La carpeta donde se encuentra el dataset.
+
+    columnas : list
+        Las columnas a cargar. Si no se especifica se cargan todas.
+
+    Returns
+    =======
+    pandas.DataFrame
+        El dataset con las columnas de etiquetas como categorías.
+
+    """
+
+    with open(f"{ruta}/esquema.json", "r", encoding="utf-8") as archivo:
+        esquema = json.load(archivo)
+
+    if esquema["version"] != VERSION_ESQUEMA:
+        raise ValueError(f"Versión de esquema no soportada: {esquema['version']}")
+
+    datos = dict()
+
+    for columna in esquema["columnas"]:
+        if columnas is not None and columna["nombre"] not in columnas:
+            continue
+
+        arreglo = np.load(f"{ruta}/{columna['archivo']}", mmap_mode="r")
+
+        if columna["tipo"] == "categoria":
+            datos[columna["nombre"]] = pd.Categorical.from_codes(
+                arreglo,
+                dtype=pd.CategoricalDtype(columna["categorias"]),
+                validate=False,
+            )
+        else:
+            datos[columna["nombre"]] = arreglo
+
+    return pd.DataFrame(datos, copy=False)
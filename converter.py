@@ -9,30 +9,311 @@ GC: Gasto corriente
 GI: Gasto de Inversión
 """
 
+import argparse
 import csv
+import hashlib
+import json
+import mmap
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 
 import pandas as pd
 import xlrd
 
+import checker
+from columnar import guardar_columnar
+from cube import guardar_cubo
+from lineage import guardar_linaje
+from profiling import en_proceso, etapa, perfilar, recibir
+from schema import (
+    COLUMNAS_ETIQUETA,
+    COLUMNAS_PROGRAMAS,
+    COLUMNAS_TOTALES,
+    TIPOS_PRESUPUESTO,
+    a_centavos,
+    a_etapas,
+    leer_csv,
+)
+from tree import guardar_arbol
 
-def convertir_archivos():
+CICLOS = range(2013, 2024)
+
+# Se debe incrementar cada vez que cambien las reglas de los
+# procesar_archivo_*, así se vuelven a convertir todos los ciclos.
+VERSION_PARSER = 1
+
+RUTA_MANIFIESTO = "./csv/.manifest.json"
+
+# El número de filas que se escriben a la vez en cada archivo CSV.
+TAMAÑO_LOTE = 1000
+
+
+def convertir_archivos(procesos=1, forzar=False):
     """
     Iteramos sobre todos los archivos XLS.
     Algunos tienen un formato ligeramente diferente respecto a otros.
 
     Cada formato requiere una función diferente, ya que tienen diferentes columnas.
+
+    Solo se convierten los ciclos cuyo archivo XLS, versión del parser
+    o archivo CSV no coinciden con lo registrado en el manifiesto.
+
+    Parameters
+    ==========
+    procesos : int
+        El número de procesos que convertirán los archivos en paralelo.
+        Con 1 se convierten uno por uno en el proceso actual.
+
+    forzar : bool
+        Si es True se convierten todos los ciclos sin revisar el manifiesto.
+
+    Returns
+    =======
+    list
+        Los ciclos que fueron convertidos.
+
+    dict
+        Los ciclos que no se pudieron convertir y su error.
+
     """
 
     os.makedirs("./csv", exist_ok=True)
 
-    for i in range(2013, 2024):
-        if i <= 2014:
-            procesar_archivo_antiguo_formato(i)
+    manifiesto = cargar_manifiesto()
+
+    pendientes = [
+        ciclo for ciclo in CICLOS if forzar or ciclo_modificado(manifiesto, ciclo)
+    ]
+
+    for ciclo in CICLOS:
+        if ciclo not in pendientes:
+            print("Sin cambios:", ciclo)
+
+    convertidos = list()
+    errores = dict()
+
+    def registrar(ciclo):
+        manifiesto[str(ciclo)] = {
+            "xls": calcular_hash(f"./xls/{ciclo}.xls"),
+            "version": VERSION_PARSER,
+            "csv": calcular_hash(f"./csv/{ciclo}.csv"),
+        }
+
+        convertidos.append(ciclo)
+        print("Procesado:", ciclo)
+
+    if procesos <= 1:
+        for ciclo in pendientes:
+            try:
+                convertir_ciclo(ciclo)
+                registrar(ciclo)
+            except Exception as e:
+                errores[ciclo] = e
+                print("Error:", ciclo, repr(e))
+    else:
+        # Cada año se escribe en su propio archivo CSV, por lo cual
+        # no hay estado compartido entre los procesos.
+        # Con el perfil activo, cada proceso regresa también sus registros.
+        tarea = en_proceso(convertir_ciclo)
+
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            futuros = {executor.submit(tarea, ciclo): ciclo for ciclo in pendientes}
+
+            for futuro in as_completed(futuros):
+                ciclo = futuros[futuro]
+
+                try:
+                    recibir(futuro.result())
+                    registrar(ciclo)
+                except Exception as e:
+                    errores[ciclo] = e
+                    print("Error:", ciclo, repr(e))
+
+    # Los ciclos con error se quitan del manifiesto para
+    # que se vuelvan a intentar en la siguiente ejecución.
+    for ciclo in errores:
+        manifiesto.pop(str(ciclo), None)
+
+    guardar_manifiesto(manifiesto)
+
+    return sorted(convertidos), errores
+
+
+def calcular_hash(ruta):
+    """
+    Calcula el hash SHA-256 del archivo especificado sin cargarlo completo en memoria.
+    """
+
+    sha = hashlib.sha256()
+
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b""):
+            sha.update(bloque)
+
+    return sha.hexdigest()
+
+
+def cargar_manifiesto():
+    """
+    Carga el manifiesto de conversión. Si no existe regresa uno vacío.
+    """
+
+    try:
+        with open(RUTA_MANIFIESTO, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return dict()
+
+
+def guardar_manifiesto(manifiesto):
+    """
+    Guarda el manifiesto de conversión ordenado por ciclo.
+    """
+
+    with open(RUTA_MANIFIESTO, "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, indent=4, sort_keys=True)
+
+
+def ciclo_modificado(manifiesto, ciclo):
+    """
+    Revisa si el ciclo especificado necesita convertirse de nuevo.
+
+    Esto sucede cuando no está en el manifiesto, cuando cambió su archivo XLS,
+    cuando cambió la versión del parser o cuando su archivo CSV fue modificado o borrado.
+    """
+
+    registro = manifiesto.get(str(ciclo))
+
+    if registro is None or registro.get("version") != VERSION_PARSER:
+        return True
+
+    ruta_csv = f"./csv/{ciclo}.csv"
+
+    if not os.path.exists(ruta_csv):
+        return True
+
+    return registro.get("xls") != calcular_hash(f"./xls/{ciclo}.xls") or registro.get(
+        "csv"
+    ) != calcular_hash(ruta_csv)
+
+
+def convertir_ciclo(ciclo):
+    """
+    Convierte el archivo .xls del ciclo especificado usando
+    las reglas de su formato correspondiente.
+
+    Parameters
+    ==========
+    ciclo : int
+        El año del archivo .xls
+
+    Returns
+    =======
+    int
+        El número de filas escritas en el archivo CSV.
+
+    """
+
+    with etapa("convertir_xls", ciclo=ciclo) as e:
+        if ciclo <= 2014:
+            filas = procesar_archivo_antiguo_formato(ciclo)
         else:
-            procesar_archivo_nuevo_formato(i)
+            filas = procesar_archivo_nuevo_formato(ciclo)
+
+        e.filas(salida=filas)
+
+    return filas
+
+
+def leer_filas(archivo, inicio):
+    """
+    Genera los valores de cada fila de la primera hoja del archivo .xls,
+    desde la fila de inicio hasta la penúltima.
+
+    El archivo se mapea en memoria y se abre con on_demand, así solo se
+    carga la hoja que necesitamos y el contenido del archivo no se copia.
+
+    Parameters
+    ==========
+    archivo : str
+        El año del archivo .xls
+
+    inicio : int
+        El índice de la primera fila con datos.
+
+    """
 
-        print("Procesado:", i)
+    with open(f"./xls/{archivo}.xls", "rb") as xls_file:
+        with mmap.mmap(xls_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            book = xlrd.open_workbook(file_contents=buffer, on_demand=True)
+
+            try:
+                sheet = book.sheet_by_index(0)
+
+                for i in range(inicio, sheet.nrows - 1):
+                    yield sheet.row_values(i)
+            finally:
+                book.release_resources()
+
+
+def escribir_csv(archivo, header, filas):
+    """
+    Escribe las filas en el archivo .csv del año especificado.
+
+    Las filas se escriben por lotes conforme se van generando,
+    por lo cual nunca se tienen todas en memoria.
+
+    Parameters
+    ==========
+    archivo : str
+        El año del archivo .xls
+
+    header : list
+        Los nombres de las columnas.
+
+    filas : iterable
+        Las filas a escribir.
+
+    Returns
+    =======
+    int
+        El número de filas escritas sin contar la cabecera.
+
+    """
+
+    total = 0
+    ruta = f"./csv/{archivo}.csv"
+
+    # Las filas se escriben en un archivo temporal que reemplaza al anterior
+    # solo al terminar. Si ocurre un error se conserva el archivo completo anterior.
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+
+    try:
+        with open(temporal, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+
+            lote = list()
+
+            for fila in filas:
+                lote.append(fila)
+
+                if len(lote) >= TAMAÑO_LOTE:
+                    writer.writerows(lote)
+                    total += len(lote)
+                    lote.clear()
+
+            writer.writerows(lote)
+            total += len(lote)
+
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    return total
 
 
 def procesar_archivo_antiguo_formato(archivo):
@@ -66,18 +347,26 @@ def procesar_archivo_antiguo_formato(archivo):
         "PORCENTAJE_INVERSIÓN",
     ]
 
-    data_list = [header]
+    return escribir_csv(archivo, header, filas_antiguo_formato(archivo))
+
+
+def filas_antiguo_formato(archivo):
+    """
+    Genera las filas del archivo .xls del antiguo formato (2013 y 2014), una por una,
+    en cuanto se resuelven sus categorías padre.
+
+    Parameters
+    ==========
+    archivo : str
+        El año del archivo .xls
 
-    book = xlrd.open_workbook(f"./xls/{archivo}.xls")
-    sheet = book.sheet_by_index(0)
+    """
 
     latest_ente = ""
     latest_ramo = ""
     latest_programa = "TOTAL"
 
-    for i in range(13, sheet.nrows - 1):
-        valores = sheet.row_values(i)
-
+    for valores in leer_filas(archivo, 13):
         current_ente = valores[1].strip()
         current_ramo = valores[2].strip()
         current_programa = valores[3].strip()
@@ -111,10 +400,7 @@ def procesar_archivo_antiguo_formato(archivo):
 
         # Filtramos filas sin denominador.
         if valores[3] != "":
-            data_list.append([archivo] + valores)
-
-    with open(f"./csv/{archivo}.csv", "w", encoding="utf-8", newline="") as csv_file:
-        csv.writer(csv_file).writerows(data_list)
+            yield [archivo] + valores
 
 
 def procesar_archivo_nuevo_formato(archivo):
@@ -156,19 +442,27 @@ def procesar_archivo_nuevo_formato(archivo):
     if archivo == 2015:
         header = [item for item in header if "JUBILACIONES" not in item]
 
-    data_list = [header]
+    return escribir_csv(archivo, header, filas_nuevo_formato(archivo))
+
 
-    book = xlrd.open_workbook(f"./xls/{archivo}.xls")
-    sheet = book.sheet_by_index(0)
+def filas_nuevo_formato(archivo):
+    """
+    Genera las filas del archivo .xls del nuevo formato (2015 en adelante), una por una,
+    en cuanto se resuelven sus categorías padre.
+
+    Parameters
+    ==========
+    archivo : str
+        El año del archivo .xls
+
+    """
 
     latest_ente = ""
     latest_ramo = ""
     latest_subramo = ""
     latest_programa = "TOTAL"
 
-    for i in range(9, sheet.nrows - 1):
-        valores = sheet.row_values(i)
-
+    for valores in leer_filas(archivo, 9):
         current_ente = valores[2].strip()
         current_ramo = valores[3].strip()
         current_subramo = valores[4].strip()
@@ -214,174 +508,214 @@ def procesar_archivo_nuevo_formato(archivo):
 
         # Filtramos filas sin denominador.
         if valores[4] != "":
-            data_list.append([archivo] + valores)
+            yield [archivo] + valores
 
-    with open(f"./csv/{archivo}.csv", "w", encoding="utf-8", newline="") as csv_file:
-        csv.writer(csv_file).writerows(data_list)
 
+# Nombres de ramos que han cambiado con el tiempo y su nombre actual.
+RAMOS_RENOMBRADOS = {
+    "Instituto Federal Electoral": "Instituto Nacional Electoral",
+    "Comunicaciones y Transportes": "Infraestructura, Comunicaciones y Transportes",
+    "Procuraduría General de la República": "Fiscalía General de la República",
+    "Procuraduría General de la República (Ahora Fiscalía General de la República)": "Fiscalía General de la República",
+    "Procuraduría General de la República (ahora Fiscalía General de la República)": "Fiscalía General de la República",
+    "Agricultura, Ganadería, Desarrollo Rural, Pesca y Alimentación": "Agricultura y Desarrollo Rural",
+    "Agricultura, Ganadería, Desarrollo Rural, Pesca y Alimentación (Ahora Agricultura y Desarrollo Rural)": "Agricultura y Desarrollo Rural",
+    "Desarrollo Social": "Bienestar",
+    "Desarrollo Social (Ahora Bienestar)": "Bienestar",
+    "Instituto Nacional de Estadística y Geografía": "Información Nacional Estadística y Geográfica",
+}
 
-def compilar_archivos():
+
+def compilar(salidas=None):
     """
-    Compila todos los archivos CSV generados en uno solo.
+    Compila todos los archivos CSV generados en los archivos de salida.
+
+    Los archivos CSV se cargan y normalizan una sola vez, después
+    cada salida se genera a partir del mismo DataFrame.
+
+    Parameters
+    ==========
+    salidas : list
+        Los nombres de las salidas a generar (ver SALIDAS).
+        Si no se especifica se generan todas.
 
-    Se realizan algunas modificaciones para mantener la consistencia
-    en todos los ciclos.
     """
 
-    lista_df = list()
+    final = normalizar(cargar_archivos())
 
-    for archivo in os.listdir("./csv"):
-        df = pd.read_csv(f"./csv/{archivo}")
-        lista_df.append(df)
+    for nombre in salidas or SALIDAS:
+        with etapa("guardar", archivo=nombre) as e:
+            e.filas(entrada=len(final), salida=SALIDAS[nombre](final))
 
-    # Unimos todos los DataFrames en uno solo.
-    final = pd.concat(lista_df)
-    final = final.apply(fix_ramo, axis=1)
+        print("Compilado:", nombre)
 
-    # Actualizamos los nombres de ramos que han cambiado con el tiempo.
-    final = final.replace(
-        {
-            "RAMO": {
-                "Instituto Federal Electoral": "Instituto Nacional Electoral",
-                "Comunicaciones y Transportes": "Infraestructura, Comunicaciones y Transportes",
-                "Procuraduría General de la República": "Fiscalía General de la República",
-                "Procuraduría General de la República (Ahora Fiscalía General de la República)": "Fiscalía General de la República",
-                "Procuraduría General de la República (ahora Fiscalía General de la República)": "Fiscalía General de la República",
-                "Agricultura, Ganadería, Desarrollo Rural, Pesca y Alimentación": "Agricultura y Desarrollo Rural",
-                "Agricultura, Ganadería, Desarrollo Rural, Pesca y Alimentación (Ahora Agricultura y Desarrollo Rural)": "Agricultura y Desarrollo Rural",
-                "Desarrollo Social": "Bienestar",
-                "Desarrollo Social (Ahora Bienestar)": "Bienestar",
-                "Instituto Nacional de Estadística y Geografía": "Información Nacional Estadística y Geográfica",
-            }
-        }
-    )
 
-    tipos = [
-        "Aprobado",
-        "Modificado",
-        "Devengado",
-        "Ejercicio",
-        "Porcentaje Ejer/Aprob",
-        "Porcentaje Ejer/Modif",
-    ]
+def salidas_pendientes():
+    """
+    Regresa los nombres de las salidas (ver SALIDAS) que se deben volver a compilar.
 
-    # Vamos a crear una nueva columna llamada DESCRIPCIÓN, la cual
-    # nos servirá para filtrar fácilmente algunos programas.
-    final["DESCRIPCIÓN"] = final["PRESUPUESTO"]
-    final["DESCRIPCIÓN"] = final["DESCRIPCIÓN"].apply(
-        lambda x: None if x in tipos else x
+    Una salida está pendiente si no existe, si es más antigua que alguno de
+    los archivos CSV de cada año o, en el caso de los CSV con columnas
+    conocidas, si sus columnas no son las del esquema actual.
+    """
+
+    ultimo_csv = max(
+        (
+            os.path.getmtime(f"./csv/{ciclo}.csv")
+            for ciclo in CICLOS
+            if os.path.exists(f"./csv/{ciclo}.csv")
+        ),
+        default=0,
     )
-    final["DESCRIPCIÓN"] = final["DESCRIPCIÓN"].ffill(limit=6)
 
-    # Quitamos las filas que son cabeceras, ya que estas no tienen valores númericos.
-    final = final[final["DESCRIPCIÓN"] != final["PRESUPUESTO"]]
+    pendientes = list()
 
-    # Quitamos las filas de porcentajes, esto es para reducir el tamaño
-    # del archivo CSVO. Estos porcentajes se pueden recalcular fácilmente.
-    final = final[
-        ~final["PRESUPUESTO"].isin(["Porcentaje Ejer/Aprob", "Porcentaje Ejer/Modif"])
-    ]
+    for nombre in SALIDAS:
+        # Las carpetas se consideran completas cuando existe su último archivo.
+        ruta = os.path.join(".", nombre, *ARCHIVOS_CARPETA.get(nombre, []))
 
-    # Quitamos las filas sin descripción, ya que estas contienen
-    # valores repetidos de sus categorías padre.
-    final = final[~pd.isna(final["DESCRIPCIÓN"])]
+        if not os.path.isfile(ruta) or os.path.getmtime(ruta) < ultimo_csv:
+            pendientes.append(nombre)
+            continue
 
-    final = final[final["PROGRAMA"] != "TOTAL"]
+        columnas = COLUMNAS_SALIDAS.get(nombre)
 
-    columnas = [
-        "CICLO",
-        "ENTE",
-        "RAMO",
-        "PROGRAMA",
-        "DESCRIPCIÓN",
-        "PRESUPUESTO",
-        "GC_SERVICIOS_PERSONALES",
-        "GC_GASTO_DE_OPERACIÓN",
-        "GC_SUBSIDIOS",
-        "GC_OTROS_DE_CORRIENTE",
-        "GC_SUMA",
-        "GI_PENSIONES_Y_JUBILACIONES",
-        "GI_INVERSIÓN_FÍSICA",
-        "GI_SUBSIDIOS",
-        "GI_OTROS_DE_INVERSIÓN",
-        "GI_SUMA",
-        "TOTAL",
-        "PORCENTAJE_CORRIENTE",
-        "PORCENTAJE_PENSIONES_Y_JUBILACIONES",
-        "PORCENTAJE_INVERSIÓN",
-    ]
+        if columnas is not None:
+            with open(ruta, "r", encoding="utf-8", newline="") as archivo:
+                encabezado = next(csv.reader(archivo), None)
 
-    # Quitamos la columna de SUBRAMO y ordenamos el resto de columnas.
-    final = final[columnas]
+            if encabezado != columnas:
+                pendientes.append(nombre)
 
-    # Finalmente guardamos el archivo a un nuevo CSV.
-    final.to_csv("./data.csv", index=False, encoding="utf-8")
+    return pendientes
 
 
-def compilar_totales():
+def compilar_archivos():
     """
-    Compila todos los archivos CSV generados en uno solo.
+    Compila todos los archivos CSV generados en uno solo (data.csv).
+    """
+
+    compilar(["data.csv"])
 
-    Se realizan algunas modificaciones para mantener la consistencia
-    en todos los ciclos.
+
+def compilar_totales():
+    """
+    Compila todos los archivos CSV generados en uno solo (data_total.csv).
 
     A diferencia de la otra función, el resultado de este archivo solo incluye
     los totales, haciendo que el archivo final sea aún más comapacto.
     """
 
+    compilar(["data_total.csv"])
+
+
+def cargar_archivos():
+    """
+    Carga todos los archivos CSV generados y los une en un solo DataFrame.
+    """
+
     lista_df = list()
 
-    for archivo in os.listdir("./csv"):
-        df = pd.read_csv(f"./csv/{archivo}")
+    for archivo in sorted(os.listdir("./csv")):
+        if not archivo.endswith(".csv"):
+            continue
+
+        # Las etiquetas se cargan como texto, ya que algunas se modifican al normalizar.
+        with etapa("leer_csv", archivo=archivo) as e:
+            df = leer_csv(f"./csv/{archivo}", categorias=False)
+            e.filas(salida=len(df))
+
         lista_df.append(df)
 
     # Unimos todos los DataFrames en uno solo.
-    final = pd.concat(lista_df)
-    final = final.apply(fix_ramo, axis=1)
+    with etapa("concat") as e:
+        final = pd.concat(lista_df, ignore_index=True)
+        e.filas(entrada=len(final), salida=len(final))
+
+    return final
+
+
+def normalizar(final):
+    """
+    Aplica las modificaciones necesarias para mantener
+    la consistencia en todos los ciclos.
+
+    El resultado aún incluye tanto los programas como los totales
+    de cada ramo, cada salida se encarga de seleccionar sus filas.
+    """
+
+    with etapa("fix_ramo") as e:
+        final = fix_ramo(final)
+        e.filas(entrada=len(final), salida=len(final))
 
     # Actualizamos los nombres de ramos que han cambiado con el tiempo.
-    final = final.replace(
-        {
-            "RAMO": {
-                "Instituto Federal Electoral": "Instituto Nacional Electoral",
-                "Comunicaciones y Transportes": "Infraestructura, Comunicaciones y Transportes",
-                "Procuraduría General de la República": "Fiscalía General de la República",
-                "Procuraduría General de la República (Ahora Fiscalía General de la República)": "Fiscalía General de la República",
-                "Procuraduría General de la República (ahora Fiscalía General de la República)": "Fiscalía General de la República",
-                "Agricultura, Ganadería, Desarrollo Rural, Pesca y Alimentación": "Agricultura y Desarrollo Rural",
-                "Agricultura, Ganadería, Desarrollo Rural, Pesca y Alimentación (Ahora Agricultura y Desarrollo Rural)": "Agricultura y Desarrollo Rural",
-                "Desarrollo Social": "Bienestar",
-                "Desarrollo Social (Ahora Bienestar)": "Bienestar",
-                "Instituto Nacional de Estadística y Geografía": "Información Nacional Estadística y Geográfica",
-            }
-        }
-    )
+    # Como categoría, cada nombre distinto se revisa una sola vez.
+    with etapa("renombrar_ramos") as e:
+        final["RAMO"] = (
+            final["RAMO"]
+            .astype("category")
+            .map(lambda x: RAMOS_RENOMBRADOS.get(x, x))
+            .astype("object")
+        )
 
-    tipos = [
-        "Aprobado",
-        "Modificado",
-        "Devengado",
-        "Ejercicio",
-        "Porcentaje Ejer/Aprob",
-        "Porcentaje Ejer/Modif",
-    ]
+        e.filas(entrada=len(final), salida=len(final))
 
     # Vamos a crear una nueva columna llamada DESCRIPCIÓN, la cual
     # nos servirá para filtrar fácilmente algunos programas.
-    final["DESCRIPCIÓN"] = final["PRESUPUESTO"]
-    final["DESCRIPCIÓN"] = final["DESCRIPCIÓN"].apply(
-        lambda x: None if x in tipos else x
-    )
-    final["DESCRIPCIÓN"] = final["DESCRIPCIÓN"].ffill(limit=6)
+    # Las filas que son un tipo de presupuesto no tienen descripción.
+    with etapa("descripcion_ffill") as e:
+        final["DESCRIPCIÓN"] = final["PRESUPUESTO"].where(
+            ~final["PRESUPUESTO"].isin(TIPOS_PRESUPUESTO)
+        )
+        final["DESCRIPCIÓN"] = final["DESCRIPCIÓN"].ffill(limit=6)
 
-    # Quitamos las filas que son cabeceras, ya que estas no tienen valores númericos.
-    final = final[final["DESCRIPCIÓN"] != final["PRESUPUESTO"]]
+        e.filas(entrada=len(final), salida=len(final))
 
-    # Quitamos las filas de porcentajes, esto es para reducir el tamaño
-    # del archivo CSVO. Estos porcentajes se pueden recalcular fácilmente.
-    final = final[
-        ~final["PRESUPUESTO"].isin(["Porcentaje Ejer/Aprob", "Porcentaje Ejer/Modif"])
-    ]
+    with etapa("filtrar_filas") as e:
+        e.filas(entrada=len(final))
+
+        # Quitamos las filas que son cabeceras, ya que estas no tienen valores númericos.
+        final = final[final["DESCRIPCIÓN"] != final["PRESUPUESTO"]]
+
+        # Quitamos las filas de porcentajes, esto es para reducir el tamaño
+        # del archivo CSVO. Estos porcentajes se pueden recalcular fácilmente.
+        final = final[
+            ~final["PRESUPUESTO"].isin(
+                ["Porcentaje Ejer/Aprob", "Porcentaje Ejer/Modif"]
+            )
+        ]
+
+        e.filas(salida=len(final))
+
+    # Ya con los valores finales, las etiquetas se guardan como categorías.
+    with etapa("categorias") as e:
+        for columna in COLUMNAS_ETIQUETA:
+            final[columna] = final[columna].astype("category")
+
+        e.filas(entrada=len(final), salida=len(final))
+
+    return final
+
+
+def filtrar_programas(final):
+    """
+    Selecciona las filas de cada programa del DataFrame normalizado.
+    """
+
+    # Quitamos las filas sin descripción, ya que estas contienen
+    # valores repetidos de sus categorías padre.
+    final = final[~pd.isna(final["DESCRIPCIÓN"])]
+
+    final = final[final["PROGRAMA"] != "TOTAL"]
+
+    # Quitamos la columna de SUBRAMO y ordenamos el resto de columnas.
+    return final[COLUMNAS_PROGRAMAS]
+
+
+def filtrar_totales(final):
+    """
+    Selecciona las filas con los totales de cada ramo del DataFrame normalizado.
+    """
 
     # Quitamos las filas sin ramo, ya que estas contienen
     # valores repetidos de sus categorías padre.
@@ -389,35 +723,146 @@ def compilar_totales():
 
     final = final[final["PROGRAMA"] == "TOTAL"]
 
-    columnas = [
-        "CICLO",
-        "ENTE",
-        "RAMO",
-        "PRESUPUESTO",
-        "GC_SERVICIOS_PERSONALES",
-        "GC_GASTO_DE_OPERACIÓN",
-        "GC_SUBSIDIOS",
-        "GC_OTROS_DE_CORRIENTE",
-        "GC_SUMA",
-        "GI_PENSIONES_Y_JUBILACIONES",
-        "GI_INVERSIÓN_FÍSICA",
-        "GI_SUBSIDIOS",
-        "GI_OTROS_DE_INVERSIÓN",
-        "GI_SUMA",
-        "TOTAL",
-        "PORCENTAJE_CORRIENTE",
-        "PORCENTAJE_PENSIONES_Y_JUBILACIONES",
-        "PORCENTAJE_INVERSIÓN",
-    ]
-
     # Quitamos la columna de SUBRAMO y ordenamos el resto de columnas.
-    final = final[columnas]
+    return final[COLUMNAS_TOTALES]
 
-    # Finalmente guardamos el archivo a un nuevo CSV.
-    final.to_csv("./data_total.csv", index=False, encoding="utf-8")
 
+def guardar_programas(final):
+    """
+    Guarda el archivo con el desglose por programa.
+    """
+
+    df = filtrar_programas(final)
+    df.to_csv("./data.csv", index=False, encoding="utf-8")
+
+    return len(df)
+
+
+def guardar_totales(final):
+    """
+    Guarda el archivo con los totales de cada ramo.
+    """
+
+    df = filtrar_totales(final)
+    df.to_csv("./data_total.csv", index=False, encoding="utf-8")
+
+    return len(df)
+
+
+def guardar_programas_centavos(final):
+    """
+    Guarda el desglose por programa con los montos en centavos enteros.
+    """
+
+    df = a_centavos(filtrar_programas(final))
+    df.to_csv("./data_centavos.csv", index=False, encoding="utf-8")
+
+    return len(df)
+
+
+def guardar_totales_centavos(final):
+    """
+    Guarda los totales de cada ramo con los montos en centavos enteros.
+    """
 
-def fix_ramo(x):
+    df = a_centavos(filtrar_totales(final))
+    df.to_csv("./data_total_centavos.csv", index=False, encoding="utf-8")
+
+    return len(df)
+
+
+def guardar_programas_etapas(final):
+    """
+    Guarda el desglose por programa con una fila por partida
+    y una columna por etapa del presupuesto.
+    """
+
+    df = a_etapas(filtrar_programas(final))
+    df.to_csv("./data_etapas.csv", index=False, encoding="utf-8")
+
+    return len(df)
+
+
+def guardar_totales_etapas(final):
+    """
+    Guarda los totales de cada ramo con una fila por ramo
+    y una columna por etapa del presupuesto.
+    """
+
+    df = a_etapas(filtrar_totales(final))
+    df.to_csv("./data_total_etapas.csv", index=False, encoding="utf-8")
+
+    return len(df)
+
+
+def guardar_programas_columnar(final):
+    """
+    Guarda el desglose por programa en formato columnar (ver columnar.py).
+    """
+
+    df = filtrar_programas(final)
+    guardar_columnar(df, "./data_columnar")
+
+    return len(df)
+
+
+def guardar_programas_cubo(final):
+    """
+    Guarda el cubo con los totales precalculados (ver cube.py).
+    """
+
+    return guardar_cubo(filtrar_programas(final), "./data_cubo.csv")
+
+
+def guardar_programas_arbol(final):
+    """
+    Guarda el índice de la jerarquía con los totales de cada nodo (ver tree.py).
+    """
+
+    return guardar_arbol(filtrar_programas(final), "./data_arbol.csv")
+
+
+def guardar_programas_linaje(final):
+    """
+    Guarda el índice que relaciona los programas entre ciclos (ver lineage.py).
+    Regresa el número de programas distintos.
+    """
+
+    return guardar_linaje(filtrar_programas(final), "./data_linaje")
+
+
+# Las salidas que se generan a partir del DataFrame normalizado.
+# Para agregar una nueva salida basta con registrar su función aquí,
+# la cual debe regresar el número de filas que guardó.
+SALIDAS = {
+    "data.csv": guardar_programas,
+    "data_total.csv": guardar_totales,
+    "data_centavos.csv": guardar_programas_centavos,
+    "data_total_centavos.csv": guardar_totales_centavos,
+    "data_etapas.csv": guardar_programas_etapas,
+    "data_total_etapas.csv": guardar_totales_etapas,
+    "data_columnar": guardar_programas_columnar,
+    "data_cubo.csv": guardar_programas_cubo,
+    "data_arbol.csv": guardar_programas_arbol,
+    "data_linaje": guardar_programas_linaje,
+}
+
+# Las columnas de las salidas CSV, si cambian se deben volver a compilar.
+COLUMNAS_SALIDAS = {
+    "data.csv": COLUMNAS_PROGRAMAS,
+    "data_total.csv": COLUMNAS_TOTALES,
+    "data_centavos.csv": COLUMNAS_PROGRAMAS,
+    "data_total_centavos.csv": COLUMNAS_TOTALES,
+}
+
+# El archivo que se escribe al final en las salidas que son carpetas.
+ARCHIVOS_CARPETA = {
+    "data_columnar": ["esquema.json"],
+    "data_linaje": ["programas.csv"],
+}
+
+
+def fix_ramo(final):
     """
     Esta función mueve el contenido de RAMO a ENTE y de SUBRAMO a RAMO
     solo en las filas donde el ENTE sea Poder Ejecutivo.
@@ -425,16 +870,88 @@ def fix_ramo(x):
     Esto es con el propósito de que sea consistente en todos los ciclos.
     """
 
-    if x["ENTE"] == "Poder Ejecutivo":
-        x["ENTE"] = x["RAMO"]
-        x["RAMO"] = x["SUBRAMO"]
+    final = final.copy()
 
-        return x
-    else:
-        return x
+    ejecutivo = (final["ENTE"] == "Poder Ejecutivo").to_numpy()
+
+    final.loc[ejecutivo, "ENTE"] = final.loc[ejecutivo, "RAMO"].to_numpy()
+    final.loc[ejecutivo, "RAMO"] = final.loc[ejecutivo, "SUBRAMO"].to_numpy()
+
+    return final
 
 
 if __name__ == "__main__":
-    convertir_archivos()
-    compilar_archivos()
-    compilar_totales()
+    parser = argparse.ArgumentParser(
+        description="Convierte los archivos de Cuenta Pública."
+    )
+
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Número de procesos para convertir los archivos XLS.",
+    )
+
+    parser.add_argument(
+        "--forzar",
+        action="store_true",
+        help="Convierte todos los archivos XLS aunque no hayan cambiado.",
+    )
+
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        help="Verifica los archivos compilados y termina con error si hay diferencias.",
+    )
+
+    parser.add_argument(
+        "--perfil",
+        "--profile",
+        nargs="?",
+        const="./perfil_converter.json",
+        help="Guarda el tiempo, las filas y la memoria de cada etapa en un reporte JSON.",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        help="Con --perfil, guarda también las estadísticas de cProfile en esta ruta.",
+    )
+
+    args = parser.parse_args()
+
+    perfil = (
+        perfilar(args.perfil, args.cprofile, "converter")
+        if args.perfil
+        else nullcontext()
+    )
+
+    with perfil:
+        convertidos, errores = convertir_archivos(args.procesos, args.forzar)
+
+        # Si algún ciclo no se pudo convertir, su archivo CSV está desactualizado,
+        # así que no compilamos para no publicar cifras incompletas.
+        if errores:
+            print("No se compilaron los archivos, hubo errores en:", sorted(errores))
+            sys.exit(1)
+
+        # Todas las salidas incluyen todos los ciclos, por lo cual si algún
+        # ciclo cambió se vuelven a compilar completas. Si no, solo se
+        # compilan las salidas que faltan o están desactualizadas.
+        pendientes = (
+            list(SALIDAS) if convertidos or args.forzar else salidas_pendientes()
+        )
+
+        if pendientes:
+            compilar(pendientes)
+        else:
+            print("Los archivos compilados están actualizados.")
+
+        if args.verificar:
+            with etapa("verificar"):
+                reporte = checker.verificar()
+
+            checker.resumir(reporte)
+
+    # Terminamos con error para detener la publicación de los archivos.
+    if args.verificar and not reporte.empty:
+        sys.exit(1)
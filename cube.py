@@ -0,0 +1,167 @@
+"""
+Este script crea un cubo con los totales precalculados de Cuenta Pública.
+
+El cubo contiene la suma de cada medida para todas las combinaciones
+de CICLO, ENTE, RAMO y PRESUPUESTO, incluyendo los subtotales.
+En los subtotales, las dimensiones agregadas tienen el valor TODOS.
+
+Por ejemplo, el total aprobado de los Órganos Autónomos en 2022 es la fila:
+CICLO=2022, ENTE=Órganos Autónomos, RAMO=*, PRESUPUESTO=Aprobado
+
+Las sumas se calculan en centavos enteros, así cada total es exacto
+sin importar el orden en que se suman las filas.
+"""
+
+from itertools import combinations
+
+import pandas as pd
+
+from schema import MONTOS, SUMAS, a_centavos, a_pesos
+
+DIMENSIONES = ["CICLO", "ENTE", "RAMO", "PRESUPUESTO"]
+
+TODOS = "*"
+
+
+def construir_cubo(df):
+    """
+    Calcula los totales de todas las combinaciones de DIMENSIONES.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con el formato de data.csv
+
+    Returns
+    =======
+    pandas.DataFrame
+        Una fila por cada combinación de dimensiones y una columna por medida.
+
+    """
+
+    guardadas = [columna for columna in MONTOS if columna in df.columns]
+
+    # Las sumas no vienen en data.csv, las calculamos en centavos
+    # para que el cubo las siga incluyendo.
+    medidas = [
+        columna for columna in MONTOS if columna in guardadas or columna in SUMAS
+    ]
+
+    # Las celdas vacías suman 0, igual que en pandas.
+    df = (
+        a_centavos(df[DIMENSIONES + guardadas])
+        .derivadas.agregar(*[suma for suma in SUMAS if suma not in guardadas])[
+            DIMENSIONES + medidas
+        ]
+        .fillna({medida: 0 for medida in medidas})
+        .astype({medida: "int64" for medida in medidas})
+    )
+
+    partes = list()
+
+    for n in range(len(DIMENSIONES) + 1):
+        for grupo in combinations(DIMENSIONES, n):
+            if grupo:
+                parte = (
+                    df.groupby(list(grupo), observed=True)[medidas].sum().reset_index()
+                )
+            else:
+                parte = df[medidas].sum().to_frame().T
+
+            for dimension in DIMENSIONES:
+                if dimension in grupo:
+                    parte[dimension] = parte[dimension].astype(str)
+                else:
+                    parte[dimension] = TODOS
+
+            partes.append(parte[DIMENSIONES + medidas])
+
+    return a_pesos(pd.concat(partes, ignore_index=True))
+
+
+class Cubo:
+    """
+    Responde consultas de totales usando el cubo precalculado.
+
+    Cada consulta es una búsqueda en un diccionario,
+    por lo cual no es necesario recorrer las filas.
+    """
+
+    def __init__(self, cubo):
+        medidas = [columna for columna in cubo.columns if columna in MONTOS]
+
+        self.medidas = {medida: j for j, medida in enumerate(medidas)}
+        self.valores = cubo[medidas].to_numpy(dtype="float64")
+
+        llaves = zip(*(cubo[dimension].astype(str) for dimension in DIMENSIONES))
+        self.indice = {llave: i for i, llave in enumerate(llaves)}
+
+    def consultar(
+        self, ciclo=None, ente=None, ramo=None, presupuesto=None, medida="TOTAL"
+    ):
+        """
+        Regresa el total de la medida para la combinación especificada.
+
+        Las dimensiones que no se especifican se suman completas.
+        Si la combinación no existe se lanza un KeyError, igual que en tree.py.
+
+        Parameters
+        ==========
+        ciclo : int
+            El año fiscal.
+
+        ente : str
+            El ente, por ejemplo: Poder Judicial.
+
+        ramo : str
+            El ramo, por ejemplo: Bienestar.
+
+        presupuesto : str
+            La etapa del presupuesto, por ejemplo: Aprobado.
+
+        medida : str
+            La columna a consultar, por ejemplo: TOTAL o GC_SUMA.
+
+        """
+
+        llave = tuple(
+            TODOS if valor is None else str(valor)
+            for valor in (ciclo, ente, ramo, presupuesto)
+        )
+
+        i = self.indice.get(llave)
+
+        if i is None:
+            raise KeyError(f"Combinación no encontrada: {', '.join(llave)}")
+
+        return self.valores[i, self.medidas[medida]]
+
+
+def guardar_cubo(df, ruta):
+    """
+    Calcula y guarda el cubo del DataFrame especificado.
+    Regresa el número de filas del cubo.
+    """
+
+    cubo = construir_cubo(df)
+    cubo.to_csv(ruta, index=False, encoding="utf-8")
+
+    return len(cubo)
+
+
+def cargar_cubo(ruta="./data_cubo.csv"):
+    """
+    Carga el cubo guardado y regresa un objeto Cubo listo para consultar.
+    """
+
+    # Las dimensiones se leen como texto, así el valor TODOS
+    # y los ciclos tienen el mismo tipo.
+    cubo = pd.read_csv(
+        ruta,
+        dtype={dimension: str for dimension in DIMENSIONES},
+        keep_default_na=False,
+        na_values={medida: [""] for medida in MONTOS},
+        float_precision="round_trip",
+    )
+
+    return Cubo(cubo)
@@ -0,0 +1,201 @@
+"""
+Este script calcula los factores para ajustar las cifras por inflación
+usando el Índice de Precios al Consumidor (IPC).
+
+El factor de cada periodo es el IPC de referencia entre el IPC del periodo.
+Al multiplicar una cifra nominal por su factor se obtiene la cifra
+a precios constantes del mes de referencia.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from loader import cargar, leer_ipc
+
+MESES = [
+    "enero",
+    "febrero",
+    "marzo",
+    "abril",
+    "mayo",
+    "junio",
+    "julio",
+    "agosto",
+    "septiembre",
+    "octubre",
+    "noviembre",
+    "diciembre",
+]
+
+# Cómo se elige el IPC de cada año:
+# diciembre: el último mes disponible del año.
+# enero: el primer mes del año.
+# promedio: el promedio de los meses disponibles del año.
+BASES = ("diciembre", "enero", "promedio")
+
+
+class Deflactor:
+    """
+    Calcula los factores de ajuste por inflación de un archivo de IPC.
+
+    Los factores se calculan una sola vez por combinación de
+    mes de referencia y base, después se reutilizan.
+    """
+
+    def __init__(self, ipc):
+        self.ipc = ipc["IPC"].sort_index()
+
+        self.factores_mensuales = lru_cache(maxsize=32)(self._factores_mensuales)
+        self.factores_anuales = lru_cache(maxsize=32)(self._factores_anuales)
+
+    def referencia(self, referencia=None):
+        """
+        Regresa el mes de referencia como Timestamp.
+        Si no se especifica se usa el mes más reciente disponible.
+        """
+
+        if referencia is None:
+            return self.ipc.index[-1]
+
+        referencia = pd.Timestamp(referencia).to_period("M").to_timestamp()
+
+        if referencia not in self.ipc.index:
+            raise ValueError(
+                f"No hay IPC para el mes de referencia: {referencia:%Y-%m}"
+            )
+
+        return referencia
+
+    def _factores_mensuales(self, referencia=None):
+        """
+        Regresa el factor de cada mes respecto al mes de referencia.
+
+        Parameters
+        ==========
+        referencia : str
+            El mes de referencia, por ejemplo: 2024-03.
+            Si no se especifica se usa el más reciente.
+
+        Returns
+        =======
+        pandas.Series
+            Los factores con el mes como índice.
+
+        """
+
+        ipc_referencia = self.ipc.loc[self.referencia(referencia)]
+
+        return ipc_referencia / self.ipc
+
+    def _factores_anuales(self, referencia=None, base="diciembre"):
+        """
+        Regresa el factor de cada año respecto al mes de referencia.
+
+        Parameters
+        ==========
+        referencia : str
+            El mes de referencia, por ejemplo: 2024-03.
+            Si no se especifica se usa el más reciente.
+
+        base : str
+            Cómo se elige el IPC de cada año (ver BASES).
+
+        Returns
+        =======
+        pandas.Series
+            Los factores con el año como índice.
+
+        """
+
+        ipc_referencia = self.ipc.loc[self.referencia(referencia)]
+
+        anual = self.ipc.resample("YS")
+
+        if base == "diciembre":
+            anual = anual.last()
+        elif base == "enero":
+            anual = anual.first()
+        elif base == "promedio":
+            anual = anual.mean()
+        else:
+            raise ValueError(f"Base no soportada: {base}")
+
+        factores = ipc_referencia / anual
+
+        # Solo necesitamos el año, así coincide con la columna CICLO.
+        factores.index = factores.index.year
+
+        return factores
+
+    def aplicar(self, df, columnas=None, referencia=None, base="diciembre", ciclo=None):
+        """
+        Ajusta por inflación las columnas especificadas.
+
+        Parameters
+        ==========
+        df : pandas.DataFrame
+            El DataFrame con las cifras nominales.
+
+        columnas : list
+            Las columnas a ajustar. Si no se especifica se ajustan todas.
+
+        referencia : str
+            El mes de referencia, por ejemplo: 2024-03.
+
+        base : str
+            Cómo se elige el IPC de cada año (ver BASES).
+
+        ciclo : str
+            La columna con el año de cada fila.
+            Si no se especifica se usa el índice del DataFrame.
+
+        Returns
+        =======
+        pandas.DataFrame
+            Una copia del DataFrame con las columnas ajustadas.
+
+        """
+
+        columnas = list(df.columns if columnas is None else columnas)
+
+        años = df.index if ciclo is None else df[ciclo]
+
+        factores = (
+            self.factores_anuales(referencia, base).reindex(np.asarray(años)).to_numpy()
+        )
+
+        ajustado = df.copy()
+        ajustado[columnas] = df[columnas].to_numpy() * factores[:, np.newaxis]
+
+        return ajustado
+
+    def etiqueta(self, referencia=None):
+        """
+        Regresa la descripción de las cifras ajustadas,
+        por ejemplo: precios constantes de marzo de 2024
+        """
+
+        referencia = self.referencia(referencia)
+
+        return (
+            f"precios constantes de {MESES[referencia.month - 1]} de {referencia.year}"
+        )
+
+
+def leer_deflactor(ruta):
+    """
+    Crea el Deflactor del archivo de IPC especificado.
+    """
+
+    return Deflactor(leer_ipc(ruta))
+
+
+def cargar_deflactor(ruta="./assets/IPC.csv"):
+    """
+    Regresa el Deflactor del archivo de IPC usando la caché de loader.py,
+    así se crea una sola vez por archivo.
+    """
+
+    return cargar(ruta, lector=leer_deflactor)
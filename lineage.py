@@ -0,0 +1,446 @@
+"""
+Este script crea un índice que relaciona los programas de Cuenta Pública
+entre ciclos y les asigna un identificador estable (ID_PROGRAMA).
+
+Las descripciones y a veces las claves de los programas cambian entre
+ciclos. Cada programa de un ciclo se relaciona con los del ciclo anterior
+en el siguiente orden:
+
+1. Misma clave y descripción en el mismo ramo, en cualquier ciclo anterior.
+2. Misma clave en el mismo ramo que en el ciclo anterior (renombre).
+3. Misma descripción con otra clave en el mismo ramo (cambio_clave)
+   o en otro ramo (traspaso).
+4. Descripciones parecidas en el mismo ramo. Si la relación es uno a uno
+   se considera un cambio_clave, si un programa se relaciona con varios
+   es una division o una fusion y los programas nuevos reciben otro ID.
+
+Los programas sin relación reciben un nuevo ID. Los ID se asignan en orden
+de ciclo, ramo y clave, así agregar un nuevo ciclo no cambia los anteriores.
+
+Por ejemplo, para obtener la serie de un programa sin buscar su descripción:
+
+    linaje = cargar_linaje()
+    id_programa = linaje.id_programa(2023, "Bienestar", "S176")
+
+    df = leer_csv("./data.csv")
+    df = df[df["PRESUPUESTO"] == "Ejercicio"]
+
+    linaje.serie(df, [id_programa])
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from loader import cargar
+from search import normalizar_texto, trigramas
+
+COLUMNAS_PROGRAMAS = [
+    "ID_PROGRAMA",
+    "CICLO",
+    "ENTE",
+    "RAMO",
+    "PROGRAMA",
+    "DESCRIPCIÓN",
+]
+
+COLUMNAS_RELACIONES = ["CICLO", "ORIGEN", "DESTINO", "TIPO", "SIMILITUD"]
+
+TIPOS_RELACION = ["renombre", "cambio_clave", "traspaso", "division", "fusion"]
+
+# La similitud mínima entre dos descripciones para relacionar
+# programas con distinta clave.
+UMBRAL = 0.5
+
+
+def llave_texto(texto):
+    """
+    Normaliza la descripción para compararla: sin acentos, en minúsculas
+    y sin signos de puntuación ni espacios repetidos.
+    """
+
+    return " ".join(re.findall(r"\w+", normalizar_texto(texto)))
+
+
+def similitud(a, b):
+    """
+    Regresa la proporción de trigramas en común de dos textos normalizados.
+    """
+
+    a, b = trigramas(a), trigramas(b)
+
+    if not a or not b:
+        return float(a == b)
+
+    return len(a & b) / len(a | b)
+
+
+def construir_linaje(df):
+    """
+    Relaciona los programas de todos los ciclos y les asigna un ID estable.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con el formato de data.csv
+
+    Returns
+    =======
+    pandas.DataFrame
+        Una fila por programa y ciclo con su ID_PROGRAMA.
+
+    pandas.DataFrame
+        Las relaciones entre los ID de ciclos consecutivos.
+
+    """
+
+    programas = (
+        df[COLUMNAS_PROGRAMAS[1:]]
+        .drop_duplicates(["CICLO", "RAMO", "PROGRAMA"])
+        .astype({columna: str for columna in COLUMNAS_PROGRAMAS[2:]})
+        .sort_values(["CICLO", "RAMO", "PROGRAMA"], ignore_index=True)
+    )
+
+    # Cada descripción distinta se normaliza una sola vez.
+    textos = pd.Categorical(programas["DESCRIPCIÓN"])
+    normalizados = [llave_texto(texto) for texto in textos.categories]
+    programas["TEXTO"] = [normalizados[codigo] for codigo in textos.codes]
+
+    ids = np.full(len(programas), -1, dtype="int64")
+    relaciones = list()
+
+    # El ID de cada ramo, clave y descripción que ya apareció,
+    # y el ramo, la clave y la descripción de cada ID del ciclo anterior.
+    historia = dict()
+    anteriores = dict()
+    siguiente = 0
+
+    for ciclo, actuales in programas.groupby("CICLO", sort=True):
+        filas = list(
+            zip(
+                actuales.index,
+                actuales["RAMO"],
+                actuales["PROGRAMA"],
+                actuales["TEXTO"],
+            )
+        )
+
+        libres = dict(anteriores)
+        usados = set()
+
+        def asignar(i, id_programa):
+            ids[i] = id_programa
+            usados.add(id_programa)
+            libres.pop(id_programa, None)
+
+        def relacionar(origen, destino, tipo, valor):
+            relaciones.append((ciclo, origen, destino, tipo, round(valor, 3)))
+
+        # 1. Los programas sin cambios, aunque no aparezcan todos los ciclos.
+        for i, ramo, clave, texto in filas:
+            id_programa = historia.get((ramo, clave, texto))
+
+            if id_programa is not None and id_programa not in usados:
+                asignar(i, id_programa)
+
+        # 2. La misma clave con otra descripción.
+        por_clave = {
+            (ramo, clave): id_programa
+            for id_programa, (ramo, clave, texto) in libres.items()
+        }
+
+        for i, ramo, clave, texto in filas:
+            id_programa = por_clave.get((ramo, clave))
+
+            if ids[i] < 0 and id_programa in libres:
+                valor = similitud(texto, libres[id_programa][2])
+
+                asignar(i, id_programa)
+                relacionar(id_programa, id_programa, "renombre", valor)
+
+        # 3. La misma descripción con otra clave, primero en el mismo ramo.
+        for tipo, llave in (
+            ("cambio_clave", lambda ramo, texto: (ramo, texto)),
+            ("traspaso", lambda ramo, texto: texto),
+        ):
+            previos = dict()
+
+            for id_programa, (ramo, clave, texto) in libres.items():
+                previos.setdefault(llave(ramo, texto), list()).append(id_programa)
+
+            nuevos = dict()
+
+            for i, ramo, clave, texto in filas:
+                if ids[i] < 0:
+                    nuevos.setdefault(llave(ramo, texto), list()).append(i)
+
+            # Solo se relacionan las descripciones que no se repiten.
+            for valor, posiciones in nuevos.items():
+                candidatos = previos.get(valor, [])
+
+                if len(posiciones) == 1 and len(candidatos) == 1:
+                    asignar(posiciones[0], candidatos[0])
+                    relacionar(candidatos[0], candidatos[0], tipo, 1.0)
+
+        # 4. Las descripciones parecidas en el mismo ramo.
+        parejas = list()
+
+        for i, ramo, clave, texto in filas:
+            if ids[i] >= 0:
+                continue
+
+            for id_programa, (ramo_previo, _, texto_previo) in libres.items():
+                if ramo_previo == ramo:
+                    valor = similitud(texto, texto_previo)
+
+                    if valor >= UMBRAL:
+                        parejas.append((id_programa, i, valor))
+
+        origenes = pd.Series([p[0] for p in parejas], dtype="int64").value_counts()
+        destinos = pd.Series([p[1] for p in parejas], dtype="int64").value_counts()
+
+        for id_programa, i, valor in parejas:
+            if origenes[id_programa] == 1 and destinos[i] == 1:
+                asignar(i, id_programa)
+                relacionar(id_programa, id_programa, "cambio_clave", valor)
+                continue
+
+            if ids[i] < 0:
+                ids[i] = siguiente
+                siguiente += 1
+
+            tipo = "division" if origenes[id_programa] > 1 else "fusion"
+            relacionar(id_programa, int(ids[i]), tipo, valor)
+
+        # Los programas sin relación son programas nuevos.
+        for i, ramo, clave, texto in filas:
+            if ids[i] < 0:
+                ids[i] = siguiente
+                siguiente += 1
+
+            historia[(ramo, clave, texto)] = int(ids[i])
+
+        anteriores = {
+            int(ids[i]): (ramo, clave, texto) for i, ramo, clave, texto in filas
+        }
+
+    programas["ID_PROGRAMA"] = ids
+
+    # Los nuevos ID se asignan al final de cada ciclo, los renumeramos
+    # en orden de aparición para que no dependan del orden de las relaciones.
+    orden = pd.unique(programas["ID_PROGRAMA"])
+    nuevo = np.empty(siguiente, dtype="int64")
+    nuevo[orden] = np.arange(len(orden))
+
+    programas["ID_PROGRAMA"] = nuevo[programas["ID_PROGRAMA"]]
+
+    relaciones = pd.DataFrame(relaciones, columns=COLUMNAS_RELACIONES)
+    relaciones["ORIGEN"] = nuevo[relaciones["ORIGEN"]]
+    relaciones["DESTINO"] = nuevo[relaciones["DESTINO"]]
+
+    return programas[COLUMNAS_PROGRAMAS], relaciones
+
+
+class Linaje:
+    """
+    Consulta el índice de programas entre ciclos.
+
+    Buscar el ID de un programa no depende del número de filas,
+    y los ciclos y relaciones de un ID solo dependen de cuántos tiene.
+    """
+
+    def __init__(self, programas, relaciones):
+        self.programas = programas.sort_values(
+            ["ID_PROGRAMA", "CICLO"], ignore_index=True
+        )
+        self.relaciones = relaciones
+
+        # Las filas de cada ID son un rango continuo de self.programas.
+        self.limites = np.searchsorted(
+            self.programas["ID_PROGRAMA"].to_numpy(),
+            np.arange(self.programas["ID_PROGRAMA"].max() + 2),
+        )
+
+        self.llaves = pd.MultiIndex.from_frame(
+            self.programas[["CICLO", "RAMO", "PROGRAMA"]]
+        )
+
+        self.indice = {
+            (int(ciclo), ramo, clave): int(id_programa)
+            for ciclo, ramo, clave, id_programa in zip(
+                self.programas["CICLO"],
+                self.programas["RAMO"],
+                self.programas["PROGRAMA"],
+                self.programas["ID_PROGRAMA"],
+            )
+        }
+
+        self.vecinos = dict()
+
+        for j, (origen, destino) in enumerate(
+            zip(relaciones["ORIGEN"], relaciones["DESTINO"])
+        ):
+            self.vecinos.setdefault(int(origen), list()).append(j)
+
+            if destino != origen:
+                self.vecinos.setdefault(int(destino), list()).append(j)
+
+    def id_programa(self, ciclo, ramo, programa):
+        """
+        Regresa el ID del programa especificado.
+
+        Parameters
+        ==========
+        ciclo : int
+            El año fiscal.
+
+        ramo : str
+            El ramo, por ejemplo: Bienestar.
+
+        programa : str
+            La clave del programa, por ejemplo: S176.
+
+        """
+
+        llave = (int(ciclo), str(ramo), str(programa))
+        id_programa = self.indice.get(llave)
+
+        if id_programa is None:
+            raise KeyError(f"Programa no encontrado: {llave}")
+
+        return id_programa
+
+    def historial(self, id_programa):
+        """
+        Regresa la clave, el ramo y la descripción del ID en cada ciclo.
+        """
+
+        return self.programas.iloc[
+            self.limites[id_programa] : self.limites[id_programa + 1]
+        ]
+
+    def relacionados(self, id_programa):
+        """
+        Regresa las relaciones donde aparece el ID, tanto de origen como de destino.
+        """
+
+        return self.relaciones.iloc[self.vecinos.get(id_programa, [])]
+
+    def familia(self, id_programa):
+        """
+        Regresa el ID junto con todos los ID de los que proviene o que
+        provienen de él por medio de divisiones y fusiones.
+        """
+
+        familia = {id_programa}
+        pendientes = [id_programa]
+
+        while pendientes:
+            relaciones = self.relacionados(pendientes.pop())
+
+            for otro in pd.concat([relaciones["ORIGEN"], relaciones["DESTINO"]]):
+                if otro not in familia:
+                    familia.add(int(otro))
+                    pendientes.append(int(otro))
+
+        return sorted(familia)
+
+    def agregar_id(self, df):
+        """
+        Agrega la columna ID_PROGRAMA a un DataFrame con el formato de data.csv
+
+        Las filas de programas que no están en el índice reciben -1.
+        """
+
+        posiciones = self.llaves.get_indexer(
+            pd.MultiIndex.from_arrays(
+                [
+                    df["CICLO"].astype("int64"),
+                    df["RAMO"].astype(str),
+                    df["PROGRAMA"].astype(str),
+                ]
+            )
+        )
+
+        ids = self.programas["ID_PROGRAMA"].to_numpy()[posiciones]
+        ids[posiciones < 0] = -1
+
+        return df.assign(ID_PROGRAMA=ids)
+
+    def serie(self, df, ids, medida="TOTAL"):
+        """
+        Regresa la suma de la medida por ciclo de cada uno de los ID especificados.
+
+        Parameters
+        ==========
+        df : pandas.DataFrame
+            El DataFrame con el formato de data.csv, por ejemplo
+            ya filtrado por PRESUPUESTO.
+
+        ids : list
+            Los ID de los programas.
+
+        medida : str
+            La columna a sumar, por ejemplo: TOTAL o GC_SUMA.
+
+        Returns
+        =======
+        pandas.DataFrame
+            Un renglón por ciclo y una columna por ID.
+
+        """
+
+        df = self.agregar_id(df[["CICLO", "RAMO", "PROGRAMA", medida]])
+        df = df[df["ID_PROGRAMA"].isin(list(ids))]
+
+        return df.pivot_table(
+            index="CICLO", columns="ID_PROGRAMA", values=medida, aggfunc="sum"
+        )
+
+
+def guardar_linaje(df, ruta):
+    """
+    Calcula y guarda el índice de programas en la carpeta especificada.
+    Regresa el número de programas distintos.
+    """
+
+    programas, relaciones = construir_linaje(df)
+
+    os.makedirs(ruta, exist_ok=True)
+
+    # El archivo de programas se escribe al final, ya que la caché
+    # de loader.py revisa su fecha de modificación.
+    relaciones.to_csv(f"{ruta}/relaciones.csv", index=False, encoding="utf-8")
+    programas.to_csv(f"{ruta}/programas.csv", index=False, encoding="utf-8")
+
+    return programas["ID_PROGRAMA"].nunique()
+
+
+def leer_linaje(ruta_programas):
+    """
+    Lee el índice guardado a partir de su archivo de programas
+    y regresa un objeto Linaje.
+    """
+
+    ruta = os.path.dirname(ruta_programas)
+
+    programas = pd.read_csv(
+        ruta_programas,
+        dtype={columna: str for columna in COLUMNAS_PROGRAMAS[2:]},
+        keep_default_na=False,
+    )
+
+    relaciones = pd.read_csv(f"{ruta}/relaciones.csv")
+
+    return Linaje(programas, relaciones)
+
+
+def cargar_linaje(ruta="./data_linaje"):
+    """
+    Regresa el Linaje de la carpeta especificada usando la caché de loader.py,
+    así se crea una sola vez por archivo.
+    """
+
+    return cargar(os.path.join(ruta, "programas.csv"), lector=leer_linaje)
@@ -0,0 +1,123 @@
+"""
+Este script mantiene en memoria los datasets que ya fueron cargados.
+
+Cada archivo se carga una sola vez por proceso. Si el archivo cambia
+(su fecha de modificación o su tamaño), se vuelve a cargar
+automáticamente en la siguiente consulta.
+
+Los DataFrames se comparten entre todas las llamadas,
+por lo cual no deben modificarse directamente.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from schema import leer_csv
+
+# El número máximo de datasets que se mantienen en memoria.
+LIMITE = 16
+
+_cache = OrderedDict()
+_candado = threading.Lock()
+
+
+def cargar(ruta, lector=leer_csv, **kwargs):
+    """
+    Carga el archivo especificado o lo regresa de la caché si no ha cambiado.
+
+    Parameters
+    ==========
+    ruta : str
+        La ruta del archivo.
+
+    lector : callable
+        La función que carga el archivo, recibe la ruta y kwargs.
+
+    kwargs
+        Los argumentos adicionales para el lector, por ejemplo: columnas.
+
+    Returns
+    =======
+    pandas.DataFrame
+        El dataset cargado.
+
+    """
+
+    estado = os.stat(ruta)
+    firma = (estado.st_mtime_ns, estado.st_size)
+
+    llave = (
+        os.path.abspath(ruta),
+        lector.__module__,
+        lector.__qualname__,
+        tuple(sorted((k, congelar(v)) for k, v in kwargs.items())),
+    )
+
+    with _candado:
+        entrada = _cache.get(llave)
+
+        if entrada is not None and entrada[0] == firma:
+            _cache.move_to_end(llave)
+            return entrada[1]
+
+    valor = lector(ruta, **kwargs)
+
+    with _candado:
+        _cache[llave] = (firma, valor)
+        _cache.move_to_end(llave)
+
+        # Quitamos los datasets que tienen más tiempo sin usarse.
+        while len(_cache) > LIMITE:
+            _cache.popitem(last=False)
+
+    return valor
+
+
+def invalidar(ruta=None):
+    """
+    Quita de la caché los datasets del archivo especificado.
+    Si no se especifica un archivo se vacía toda la caché.
+    """
+
+    with _candado:
+        if ruta is None:
+            _cache.clear()
+            return
+
+        ruta = os.path.abspath(ruta)
+
+        for llave in [llave for llave in _cache if llave[0] == ruta]:
+            del _cache[llave]
+
+
+def congelar(valor):
+    """
+    Convierte listas y diccionarios en tuplas para poder usarlos como llave.
+    """
+
+    if isinstance(valor, dict):
+        return tuple(sorted((k, congelar(v)) for k, v in valor.items()))
+
+    if isinstance(valor, (list, tuple, set)):
+        return tuple(congelar(v) for v in valor)
+
+    return valor
+
+
+def leer_ipc(ruta):
+    """
+    Carga el archivo del Índice de Precios al Consumidor.
+    """
+
+    return pd.read_csv(ruta, parse_dates=["Fecha"], index_col="Fecha")
+
+
+def cargar_ipc(ruta="./assets/IPC.csv"):
+    """
+    Carga el archivo del IPC usando la caché.
+    """
+
+    return cargar(ruta, lector=leer_ipc)
@@ -3,48 +3,30 @@ Este script contiene ejemplos de como usar la base de datos
 de Cuenta Pública creada en converter.py
 """
 
+import argparse
+import os
+from contextlib import nullcontext
+
 import pandas as pd
 import plotly.graph_objects as go
 
+from charts import plantilla_barras, tabla_porcentajes
+from deflator import cargar_deflactor
+from loader import cargar
+from profiling import etapa, perfilar
+from query import CuentaPublica
+from renderer import Renderizador, exportar_con_cache
+from search import cargar_indice
+
 
-def main():
+def main(renderizador=None):
     """
     Esta función compara cifras anuales de distintos ramos / programas.
     """
 
-    # Cargamos el dataset que contiene la información de todoslos archivos XLS.
-    df = pd.read_csv("./data.csv")
-
-    # Seleccioamos los registros del año 2019 al 2023.
-    df = df[df["CICLO"].between(2019, 2023)]
-
-    # Seleccionamos las cifras de presupuesto ejercido.
-    df = df[df["PRESUPUESTO"] == "Ejercicio"]
-
-    # Seleccionamos las cifras del ramo: INAI.
-    inai = (
-        df[
-            df["RAMO"]
-            == "Instituto Nacional de Transparencia, Acceso a la Información y Protección de Datos Personales"
-        ]
-        .groupby("CICLO")
-        .sum()["TOTAL"]
-        / 1000000
-    )
-
-    # Seleccionamos las cifras del ramo: INE.
-    ine = (
-        df[df["RAMO"] == "Instituto Nacional Electoral"].groupby("CICLO").sum()["TOTAL"]
-        / 1000000
-    )
-
-    # Seleccionamos las cifras del programa: Jóvenes Cosnstruyendo el Futuro.
-    jovenes = (
-        df[df["DESCRIPCIÓN"] == "Jóvenes Construyendo el Futuro"]
-        .groupby("CICLO")
-        .sum()["TOTAL"]
-        / 1000000
-    )
+    with etapa("datos_comparacion") as e:
+        inai, ine, jovenes = datos_comparacion()
+        e.filas(salida=len(inai) + len(ine) + len(jovenes))
 
     # Vamos a crear 3 gráficas de barras verticales para
     # comparar los valores anuales de cada categoría.
@@ -199,12 +181,53 @@ def main():
         ],
     )
 
-    fig.write_image("./comparacion_anual.png")
+    exportar(fig, "./comparacion_anual.png", renderizador)
+
+
+def datos_comparacion():
+    """
+    Regresa las cifras ejercidas del INAI, del INE y del programa
+    Jóvenes Construyendo el Futuro del 2019 al 2023, en millones de pesos.
+    """
+
+    # Consultamos las cifras ejercidas del 2019 al 2023. Solo se leen
+    # las columnas y los años que usaremos para filtrar y sumar.
+    consulta = CuentaPublica().ciclos(2019, 2023).etapa("Ejercicio").medidas("TOTAL")
+
+    # Seleccionamos las cifras del ramo: INAI.
+    inai = (
+        consulta.ramo(
+            "Instituto Nacional de Transparencia, Acceso a la Información y Protección de Datos Personales"
+        ).sumar_por("CICLO")["TOTAL"]
+        / 1000000
+    )
 
+    # Seleccionamos las cifras del ramo: INE.
+    ine = (
+        consulta.ramo("Instituto Nacional Electoral").sumar_por("CICLO")["TOTAL"]
+        / 1000000
+    )
 
-def main2():
+    # Seleccionamos las cifras del programa: Jóvenes Cosnstruyendo el Futuro.
+    jovenes = (
+        consulta.descripcion("Jóvenes Construyendo el Futuro").sumar_por("CICLO")[
+            "TOTAL"
+        ]
+        / 1000000
+    )
+
+    return inai, ine, jovenes
+
+
+def main2(renderizador=None):
     graficar_programa(
-        "vacuna", "Programa de Vacunación", "#5D69B1", "#E58606", "left", 1
+        "vacuna",
+        "Programa de Vacunación",
+        "#5D69B1",
+        "#E58606",
+        "left",
+        1,
+        renderizador=renderizador,
     )
 
     graficar_programa(
@@ -214,6 +237,7 @@ def main2():
         "#2F8AC4",
         "right",
         2,
+        renderizador=renderizador,
     )
 
     graficar_ramo(
@@ -223,6 +247,7 @@ def main2():
         "#24796C",
         "left",
         3,
+        renderizador=renderizador,
     )
 
     graficar_ramo(
@@ -232,6 +257,7 @@ def main2():
         "#52BCA3",
         "right",
         4,
+        renderizador=renderizador,
     )
 
     graficar_ramo(
@@ -241,428 +267,195 @@ def main2():
         "#ff3d00",
         "left",
         5,
+        renderizador=renderizador,
     )
 
-    graficar_ramo("Turismo", "Secretaría del Turismo", "#ffa000", "#689f38", "left", 6)
-
-
-def graficar_programa(nombre, titulo, color1, color2, pos, archivo):
+    graficar_ramo(
+        "Turismo",
+        "Secretaría del Turismo",
+        "#ffa000",
+        "#689f38",
+        "left",
+        6,
+        renderizador=renderizador,
+    )
+
+
+def graficar_programa(
+    nombre,
+    titulo,
+    color1,
+    color2,
+    pos,
+    archivo,
+    referencia=None,
+    base="diciembre",
+    renderizador=None,
+):
     """
     Esta función crea gráficas de barras con el nombre del programa especificado.
     Las cifras se ajustan por inflación usando el Índice de Precios al Consumidor.
-    """
-
-    # Cargamos el dataset de IPC.
-    ipc = pd.read_csv("./assets/IPC.csv", parse_dates=["Fecha"], index_col="Fecha")
-
-    # Este IPC será nuestro valor de referencia.
-    # El valor puede cambiar con el tiempo.
-    ipc_referencia = ipc["IPC"].iloc[-1]
-
-    # Si queremos usar el IPC de enero usamos first()
-    # Si queremos usar el IPC de diciembre usamos last()
-    ipc = ipc.resample("YS").last()
-
-    # CAlculamos el factor.
-    ipc["FACTOR"] = ipc_referencia / ipc["IPC"]
-
-    # Solo necesitamos el año del IPC.
-    ipc.index = ipc.index.year
-
-    # Cargamos el dataset de Cuenta Pública.
-    df = pd.read_csv("./data.csv")
-
-    # Filtramos nuestro DataFrame con el programa especificado.
-    final = df[df["DESCRIPCIÓN"].str.contains(nombre, case=False)]
 
-    final = (
-        final.pivot_table(
-            index="CICLO", columns="PRESUPUESTO", values="TOTAL", aggfunc="sum"
-        )
-        / 1000000
-    )
+    El mes de referencia (por ejemplo: 2024-03) y la base anual
+    (diciembre, enero o promedio) se pueden cambiar, ver deflator.py.
+    """
 
-    # Ajustamos las cifras por la inflación.
-    final["Aprobado_Ajustado"] = final["Aprobado"] * ipc["FACTOR"]
-    final["Ejercicio_Ajustado"] = final["Ejercicio"] * ipc["FACTOR"]
+    with etapa("datos_programa", programa=nombre) as e:
+        final = datos_programa(nombre)
+        e.filas(salida=len(final))
 
-    # Creamos los textos para las cifras ajustadas.
-    final["Aprobado_Ajustado_Texto"] = final["Aprobado_Ajustado"].apply(abreviar_cifra)
-    final["Ejercicio_Ajustado_Texto"] = final["Ejercicio_Ajustado"].apply(
-        abreviar_cifra
+    graficar_barras(
+        final,
+        f"Evolución del gasto total anual del <b>{titulo}</b> en México",
+        color1,
+        color2,
+        pos,
+        archivo,
+        referencia,
+        base,
+        renderizador,
     )
 
-    # Vamos a crear una tabla con los porcentajes anuales.
-    tabla = "<b>Ejercido/Aprobado</b>"
-
-    for k, v in final.iterrows():
-        try:
-            tabla += f"<br>{k}: {(v['Ejercicio_Ajustado'] / v['Aprobado_Ajustado']) * 100:,.2f}%"
-        except Exception as _:
-            # En algunos casos el monto aprobado es 0.
-            tabla += f"<br>{k}: ---"
 
-    fig = go.Figure()
+def datos_programa(nombre):
+    """
+    Regresa las cifras nominales anuales del programa especificado en millones de pesos,
+    con las columnas Aprobado y Ejercicio.
 
-    fig.add_trace(
-        go.Bar(
-            x=final.index,
-            y=final["Aprobado_Ajustado"],
-            text=final["Aprobado_Ajustado_Texto"],
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=18,
-            textposition="outside",
-            name="Aprobado",
-            marker_color=color1,
-            opacity=1.0,
-            marker_line_width=0,
-        )
-    )
+    La búsqueda no distingue mayúsculas, minúsculas ni acentos.
+    """
 
-    fig.add_trace(
-        go.Bar(
-            x=final.index,
-            y=final["Ejercicio_Ajustado"],
-            text=final["Ejercicio_Ajustado_Texto"],
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=18,
-            textposition="outside",
-            name="Ejercido",
-            marker_color=color2,
-            opacity=1.0,
-            marker_line_width=0,
-        )
+    # Cargamos el dataset de Cuenta Pública con una fila por partida
+    # y una columna por etapa del presupuesto.
+    df = cargar(
+        "./data_etapas.csv",
+        columnas=["CICLO", "DESCRIPCIÓN", "APROBADO_TOTAL", "EJERCICIO_TOTAL"],
     )
 
-    fig.update_xaxes(
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
+    # El índice de texto se crea una sola vez por archivo.
+    indice = cargar_indice("./data_etapas.csv")
 
-    # Vamos a crer el rango para el eje vertical.
-    maximo_aprobado = final["Aprobado_Ajustado"].max()
-    maximo_ejercido = final["Ejercicio_Ajustado"].max()
+    # Filtramos nuestro DataFrame con el programa especificado.
+    # La búsqueda no distingue mayúsculas, minúsculas ni acentos.
+    final = df.iloc[indice.filas(nombre)]
 
-    nuevo_maximo = (
-        maximo_aprobado if maximo_aprobado >= maximo_ejercido else maximo_ejercido
+    final = (
+        final.groupby("CICLO")[["APROBADO_TOTAL", "EJERCICIO_TOTAL"]].sum() / 1000000
     )
 
-    fig.update_yaxes(
-        range=[0, nuevo_maximo * 1.08],
-        title="Millones de pesos a precios constantes de marzo de 2024",
-        title_font_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
+    final.columns = ["Aprobado", "Ejercicio"]
 
-    # Acomodamos la tabla.
-    if pos == "left":
-        tabla_x = 0.02
-        tabla_xanchor = "left"
-    elif pos == "right":
-        tabla_x = 0.995
-        tabla_xanchor = "right"
+    return final
 
-    fig.update_layout(
-        legend_orientation="h",
-        legend_itemsizing="constant",
-        showlegend=True,
-        legend_x=0.5,
-        legend_y=1.08,
-        legend_xanchor="center",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Quicksand",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text=f"Evolución del gasto total anual del <b>{titulo}</b> en México",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=90,
-        margin_l=120,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor="#111111",
-        paper_bgcolor="#282A3A",
-        annotations=[
-            dict(
-                x=tabla_x,
-                y=0.92,
-                xref="paper",
-                yref="paper",
-                xanchor=tabla_xanchor,
-                yanchor="top",
-                bordercolor="#FFFFFF",
-                borderwidth=1.5,
-                borderpad=7,
-                bgcolor="#111111",
-                align="left",
-                font_size=12,
-                text=tabla,
-            ),
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: SHCP (Cuenta Pública 2013-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año fiscal",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
-        ],
-    )
 
-    fig.write_image(f"./{archivo}.png")
-
-
-def graficar_ramo(nombre, titulo, color1, color2, pos, archivo):
+def graficar_ramo(
+    nombre,
+    titulo,
+    color1,
+    color2,
+    pos,
+    archivo,
+    referencia=None,
+    base="diciembre",
+    renderizador=None,
+):
     """
     Esta función crea gráficas de barras con el nombre del ramo especificado.
     Las cifras se ajustan por inflación usando el Índice de Precios al Consumidor.
-    """
 
-    # Cargamos el dataset de IPC.
-    ipc = pd.read_csv("./assets/IPC.csv", parse_dates=["Fecha"], index_col="Fecha")
+    El mes de referencia (por ejemplo: 2024-03) y la base anual
+    (diciembre, enero o promedio) se pueden cambiar, ver deflator.py.
+    """
 
-    # Este IPC será nuestro valor de referencia.
-    # El valor puede cambiar con el tiempo.
-    ipc_referencia = ipc["IPC"].iloc[-1]
+    with etapa("datos_ramo", ramo=nombre) as e:
+        final = datos_ramo(nombre)
+        e.filas(salida=len(final))
 
-    # Si queremos usar el IPC de enero usamos first()
-    # Si queremos usar el IPC de diciembre usamos last()
-    ipc = ipc.resample("YS").last()
+    graficar_barras(
+        final,
+        f"Evolución del gasto total anual de <b>{titulo}</b> en México",
+        color1,
+        color2,
+        pos,
+        archivo,
+        referencia,
+        base,
+        renderizador,
+    )
 
-    # CAlculamos el factor.
-    ipc["FACTOR"] = ipc_referencia / ipc["IPC"]
 
-    # Solo necesitamos el año del IPC.
-    ipc.index = ipc.index.year
+def datos_ramo(nombre):
+    """
+    Regresa las cifras nominales anuales del ramo especificado en millones de pesos,
+    con las columnas Aprobado y Ejercicio.
+    """
 
-    # Cargamos el dataset de los totales de Cuenta Pública.
-    df = pd.read_csv("./data_total.csv")
+    # Cargamos el dataset de los totales de Cuenta Pública con una fila
+    # por ramo y una columna por etapa del presupuesto.
+    df = cargar(
+        "./data_total_etapas.csv",
+        columnas=["CICLO", "RAMO", "APROBADO_TOTAL", "EJERCICIO_TOTAL"],
+    )
 
     # Filtramos nuestro DataFrame con el ramo especificado.
     final = df[df["RAMO"] == nombre]
 
     final = (
-        final.pivot_table(
-            index="CICLO", columns="PRESUPUESTO", values="TOTAL", aggfunc="sum"
-        )
-        / 1000000
+        final.groupby("CICLO")[["APROBADO_TOTAL", "EJERCICIO_TOTAL"]].sum() / 1000000
     )
 
-    # Ajustamos las cifras por la inflación.
-    final["Aprobado_Ajustado"] = final["Aprobado"] * ipc["FACTOR"]
-    final["Ejercicio_Ajustado"] = final["Ejercicio"] * ipc["FACTOR"]
+    final.columns = ["Aprobado", "Ejercicio"]
 
-    # Creamos los textos para las cifras ajustadas.
-    final["Aprobado_Ajustado_Texto"] = final["Aprobado_Ajustado"].apply(abreviar_cifra)
-    final["Ejercicio_Ajustado_Texto"] = final["Ejercicio_Ajustado"].apply(
-        abreviar_cifra
-    )
+    return final
 
-    # Vamos a crear una tabla con los porcentajes anuales.
-    tabla = "<b>Ejercido/Aprobado</b>"
 
-    for k, v in final.iterrows():
-        try:
-            tabla += f"<br>{k}: {(v['Ejercicio_Ajustado'] / v['Aprobado_Ajustado']) * 100:,.2f}%"
-        except Exception as _:
-            # En algunos casos el monto aprobado es 0.
-            tabla += f"<br>{k}: ---"
+def graficar_barras(
+    final, titulo, color1, color2, pos, archivo, referencia, base, renderizador
+):
+    """
+    Crea la gráfica de barras de Aprobado contra Ejercido con las cifras
+    ajustadas por inflación y su tabla de porcentajes.
 
-    fig = go.Figure()
+    La figura se construye con la plantilla de charts.py,
+    la cual solo reemplaza los datos en un diseño ya creado.
 
-    fig.add_trace(
-        go.Bar(
-            x=final.index,
-            y=final["Aprobado_Ajustado"],
-            text=final["Aprobado_Ajustado_Texto"],
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=18,
-            textposition="outside",
-            name="Aprobado",
-            marker_color=color1,
-            opacity=1.0,
-            marker_line_width=0,
-        )
-    )
+    Parameters
+    ==========
+    final : pandas.DataFrame
+        Las cifras nominales en millones de pesos con el año como índice
+        y las columnas Aprobado y Ejercicio.
 
-    fig.add_trace(
-        go.Bar(
-            x=final.index,
-            y=final["Ejercicio_Ajustado"],
-            text=final["Ejercicio_Ajustado_Texto"],
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=18,
-            textposition="outside",
-            name="Ejercido",
-            marker_color=color2,
-            opacity=1.0,
-            marker_line_width=0,
-        )
-    )
+    titulo : str
+        El título de la gráfica.
 
-    fig.update_xaxes(
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
+    """
 
-    # Vamos a crer el rango para el eje vertical.
-    maximo_aprobado = final["Aprobado_Ajustado"].max()
-    maximo_ejercido = final["Ejercicio_Ajustado"].max()
+    with etapa("figura", archivo=archivo):
+        # Cargamos los factores para ajustar por inflación.
+        deflactor = cargar_deflactor()
 
-    nuevo_maximo = (
-        maximo_aprobado if maximo_aprobado >= maximo_ejercido else maximo_ejercido
-    )
+        # Ajustamos las cifras por la inflación.
+        ajustado = deflactor.aplicar(final, referencia=referencia, base=base)
 
-    fig.update_yaxes(
-        range=[0, nuevo_maximo * 1.08],
-        title="Millones de pesos a precios constantes de marzo de 2024",
-        title_font_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
+        aprobado = ajustado["Aprobado"].to_numpy()
+        ejercicio = ajustado["Ejercicio"].to_numpy()
 
-    # Acomodamos la tabla.
-    if pos == "left":
-        tabla_x = 0.02
-        tabla_xanchor = "left"
-    elif pos == "right":
-        tabla_x = 0.995
-        tabla_xanchor = "right"
+        # Vamos a crear una tabla con los porcentajes anuales.
+        tabla = tabla_porcentajes("Ejercido/Aprobado", final.index, ejercicio, aprobado)
 
-    fig.update_layout(
-        legend_orientation="h",
-        legend_itemsizing="constant",
-        showlegend=True,
-        legend_x=0.5,
-        legend_y=1.08,
-        legend_xanchor="center",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Quicksand",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text=f"Evolución del gasto total anual de <b>{titulo}</b> en México",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=90,
-        margin_l=120,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor="#111111",
-        paper_bgcolor="#282A3A",
-        annotations=[
-            dict(
-                x=tabla_x,
-                y=0.92,
-                xref="paper",
-                yref="paper",
-                xanchor=tabla_xanchor,
-                yanchor="top",
-                bordercolor="#FFFFFF",
-                borderwidth=1.5,
-                borderpad=7,
-                bgcolor="#111111",
-                align="left",
-                font_size=12,
-                text=tabla,
-            ),
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: SHCP (Cuenta Pública 2013-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año fiscal",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
-        ],
-    )
+        fig = plantilla_barras().figura(
+            final.index.to_numpy(),
+            [("Aprobado", aprobado, color1), ("Ejercido", ejercicio, color2)],
+            titulo,
+            f"Millones de pesos a {deflactor.etiqueta(referencia)}",
+            tabla,
+            pos,
+        )
 
-    fig.write_image(f"./{archivo}.png")
+    exportar(fig, f"./{archivo}.png", renderizador)
 
 
-def comparacion_pib(archivo, tipo, titulo, nota, *elementos):
+def comparacion_pib(archivo, tipo, titulo, nota, *elementos, renderizador=None):
     """
     Esta función compara el gasto en el ramo/función/etc. esepcificado
     con el PIB del mismo año.
@@ -684,6 +477,9 @@ def comparacion_pib(archivo, tipo, titulo, nota, *elementos):
     elementos : str
         La lista de elementos que se desean filtrar.
 
+    renderizador : Renderizador
+        Si se especifica, la imagen se exporta en segundo plano (ver renderer.py).
+
     """
 
     # Cargamos el CSV del PIB nominal.
@@ -852,41 +648,81 @@ def comparacion_pib(archivo, tipo, titulo, nota, *elementos):
         ],
     )
 
-    fig.write_image(f"./{archivo}.png")
+    exportar(fig, f"./{archivo}.png", renderizador)
 
 
-def abreviar_cifra(x):
+def exportar(fig, ruta, renderizador=None):
     """
-    Esta función abrevia las cifras para que los
-    textos no se desborden de las barras verticales.
+    Guarda la figura como imagen.
+
+    Si se especifica un Renderizador, la figura se agrega a su cola
+    y se exporta en paralelo con las demás (ver renderer.py).
+    En ambos casos, las figuras que no cambiaron se copian de la caché.
     """
 
-    if x >= 100000:
-        return f"{x/1000:,.0f}k"
-    elif x >= 10000:
-        return f"{x/1000:,.1f}k"
-    else:
-        return f"{x:,.0f}"
+    # Con un Renderizador solo se mide el tiempo de agregar la figura a su cola.
+    with etapa("exportar", ruta=ruta):
+        if renderizador is None:
+            exportar_con_cache(fig, ruta)
+        else:
+            renderizador.enviar(fig, ruta)
 
 
 if __name__ == "__main__":
-    main()
-    main2()
-
-    comparacion_pib(
-        7,
-        "Function",
-        "Ciencia, Tecnología e Innovación",
-        "<b>Metodología:</b><br>Se agregó el gasto total clasificado como Ciencia, Tecnología e Innovación,<br>y se ajustó en función del PIB nominal de cada año.",
-        "Ciencia, Tecnología e Innovación",
-    )
-
-    comparacion_pib(
-        8,
-        "Department",
-        "Salud",
-        "<b>Metodología:</b><br>Se agregó el gasto total de los ramos IMSS, ISSSTE y SSA,<br>y se ajustó en función del PIB nominal de cada año.",
-        "Instituto Mexicano del Seguro Social",
-        "Instituto de Seguridad y Servicios Sociales de los Trabajadores del Estado",
-        "Salud",
+    parser = argparse.ArgumentParser(description="Crea las gráficas de ejemplo.")
+
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Número de procesos para exportar las imágenes.",
+    )
+
+    parser.add_argument(
+        "--perfil",
+        "--profile",
+        nargs="?",
+        const="./perfil_plotter.json",
+        help="Guarda el tiempo, las filas y la memoria de cada etapa en un reporte JSON.",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        help="Con --perfil, guarda también las estadísticas de cProfile en esta ruta.",
     )
+
+    args = parser.parse_args()
+
+    perfil = (
+        perfilar(args.perfil, args.cprofile, "plotter")
+        if args.perfil
+        else nullcontext()
+    )
+
+    # Las imágenes se exportan en paralelo y se esperan al salir del bloque.
+    with perfil, Renderizador(procesos=args.procesos) as renderizador:
+        main(renderizador)
+        main2(renderizador)
+
+        comparacion_pib(
+            7,
+            "Function",
+            "Ciencia, Tecnología e Innovación",
+            "<b>Metodología:</b><br>Se agregó el gasto total clasificado como Ciencia, Tecnología e Innovación,<br>y se ajustó en función del PIB nominal de cada año.",
+            "Ciencia, Tecnología e Innovación",
+            renderizador=renderizador,
+        )
+
+        comparacion_pib(
+            8,
+            "Department",
+            "Salud",
+            "<b>Metodología:</b><br>Se agregó el gasto total de los ramos IMSS, ISSSTE y SSA,<br>y se ajustó en función del PIB nominal de cada año.",
+            "Instituto Mexicano del Seguro Social",
+            "Instituto de Seguridad y Servicios Sociales de los Trabajadores del Estado",
+            "Salud",
+            renderizador=renderizador,
+        )
+
+        with etapa("esperar_exportaciones"):
+            renderizador.esperar()
@@ -0,0 +1,336 @@
+"""
+Este script mide el tiempo, las filas y la memoria de cada etapa
+de converter.py y plotter.py.
+
+Las etapas se marcan con un bloque with:
+
+    with etapa("fix_ramo") as e:
+        final = fix_ramo(final)
+        e.filas(salida=len(final))
+
+Mientras el perfil no esté activo, etapa() regresa siempre el mismo
+objeto vacío, por lo cual marcar una etapa casi no tiene costo.
+Al activar el perfil con perfilar() se registra cada etapa y al
+terminar se guarda un reporte JSON y opcionalmente el de cProfile.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+
+_activo = False
+_registros = list()
+_pila = list()
+
+
+def leer_pico_rss():
+    """
+    Regresa la memoria residente máxima (pico de RSS) del proceso en bytes.
+
+    En Linux se lee de /proc, así el pico se puede reiniciar en cada etapa.
+    En otros sistemas se usa el pico de todo el proceso.
+    """
+
+    try:
+        with open("/proc/self/status", "r") as archivo:
+            for linea in archivo:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # En macOS el valor está en bytes y en Linux en kilobytes.
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def reiniciar_pico_rss():
+    """
+    Reinicia el pico de RSS del proceso, solo es posible en Linux.
+    """
+
+    try:
+        with open("/proc/self/clear_refs", "w") as archivo:
+            archivo.write("5")
+    except OSError:
+        pass
+
+
+class EtapaVacia:
+    """
+    Etapa que no registra nada, se usa cuando el perfil no está activo.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def filas(self, entrada=None, salida=None):
+        pass
+
+
+ETAPA_VACIA = EtapaVacia()
+
+
+class Etapa:
+    """
+    Registra el tiempo, las filas y el pico de memoria de una etapa.
+
+    Parameters
+    ==========
+    nombre : str
+        El nombre de la etapa, por ejemplo: fix_ramo.
+
+    datos
+        Datos adicionales del registro, por ejemplo: ciclo=2023.
+
+    """
+
+    def __init__(self, nombre, **datos):
+        self.registro = {"nombre": nombre, **datos}
+        self.pico = 0
+
+    def filas(self, entrada=None, salida=None):
+        """
+        Registra las filas que recibió y las que generó la etapa.
+        """
+
+        if entrada is not None:
+            self.registro["filas_entrada"] = int(entrada)
+
+        if salida is not None:
+            self.registro["filas_salida"] = int(salida)
+
+    def __enter__(self):
+        # El pico de la etapa padre incluye lo que llevaba hasta ahora.
+        if _pila:
+            _pila[-1].pico = max(_pila[-1].pico, leer_pico_rss())
+
+        reiniciar_pico_rss()
+
+        self.registro["nivel"] = len(_pila)
+        _pila.append(self)
+
+        # La hora de inicio se puede comparar entre procesos.
+        self.registro["inicio"] = time.time()
+        self.inicio = time.perf_counter()
+
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        duracion = time.perf_counter() - self.inicio
+
+        self.pico = max(self.pico, leer_pico_rss())
+        _pila.pop()
+
+        if _pila:
+            _pila[-1].pico = max(_pila[-1].pico, self.pico)
+
+        self.registro.update(
+            duracion=duracion,
+            rss_pico_mb=self.pico / 1024 / 1024,
+            pid=os.getpid(),
+        )
+
+        if tipo is not None:
+            self.registro["error"] = repr(valor)
+
+        _registros.append(self.registro)
+
+        return False
+
+
+def etapa(nombre, **datos):
+    """
+    Marca una etapa. Si el perfil no está activo no se registra nada.
+
+    Parameters
+    ==========
+    nombre : str
+        El nombre de la etapa.
+
+    datos
+        Datos adicionales del registro, por ejemplo: ciclo=2023.
+
+    """
+
+    if not _activo:
+        return ETAPA_VACIA
+
+    return Etapa(nombre, **datos)
+
+
+def activo():
+    """
+    Regresa True si el perfil está activo.
+    """
+
+    return _activo
+
+
+def activar():
+    """
+    Activa el registro de etapas y borra los registros anteriores.
+    """
+
+    global _activo
+
+    _registros.clear()
+    _pila.clear()
+    _activo = True
+
+
+def desactivar():
+    """
+    Desactiva el registro de etapas.
+    """
+
+    global _activo
+
+    _activo = False
+
+
+def registros():
+    """
+    Regresa una copia de los registros de las etapas.
+    """
+
+    return list(_registros)
+
+
+class ResultadoPerfilado:
+    """
+    El resultado de una función ejecutada en otro proceso junto con sus registros.
+    """
+
+    def __init__(self, resultado, registros):
+        self.resultado = resultado
+        self.registros = registros
+
+
+def _ejecutar_perfilado(funcion, *args):
+    """
+    Ejecuta la función con el perfil activo y regresa sus registros.
+    """
+
+    activar()
+
+    try:
+        return ResultadoPerfilado(funcion(*args), registros())
+    finally:
+        desactivar()
+
+
+def en_proceso(funcion):
+    """
+    Prepara una función que se ejecutará en otro proceso.
+
+    Si el perfil está activo, la función regresa también sus registros,
+    los cuales se agregan a los de este proceso con recibir().
+    """
+
+    if not _activo:
+        return funcion
+
+    return partial(_ejecutar_perfilado, funcion)
+
+
+def recibir(resultado):
+    """
+    Agrega los registros de otro proceso y regresa el resultado de la función.
+    """
+
+    if isinstance(resultado, ResultadoPerfilado):
+        _registros.extend(resultado.registros)
+        return resultado.resultado
+
+    return resultado
+
+
+def reporte(script=None):
+    """
+    Regresa el reporte con los registros y el resumen por nombre de etapa.
+    """
+
+    etapas = sorted(_registros, key=lambda registro: registro["inicio"])
+
+    # El inicio de cada etapa se reporta en segundos desde la primera.
+    origen = etapas[0]["inicio"] if etapas else 0
+
+    etapas = [
+        {**registro, "inicio": registro["inicio"] - origen} for registro in etapas
+    ]
+
+    resumen = dict()
+
+    for registro in etapas:
+        datos = resumen.setdefault(
+            registro["nombre"],
+            {"llamadas": 0, "duracion_total": 0.0, "rss_pico_mb": 0.0},
+        )
+
+        datos["llamadas"] += 1
+        datos["duracion_total"] += registro["duracion"]
+        datos["rss_pico_mb"] = max(datos["rss_pico_mb"], registro["rss_pico_mb"])
+
+    return {
+        "script": script,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "resumen": resumen,
+        "etapas": etapas,
+    }
+
+
+@contextmanager
+def perfilar(ruta, ruta_cprofile=None, script=None):
+    """
+    Activa el perfil dentro del bloque with y al salir guarda el reporte.
+
+    Parameters
+    ==========
+    ruta : str
+        La ruta del reporte JSON.
+
+    ruta_cprofile : str
+        Si se especifica, también se guardan las estadísticas de cProfile
+        del proceso actual en esta ruta (se pueden abrir con pstats o snakeviz).
+
+    script : str
+        El nombre del script que se incluye en el reporte.
+
+    """
+
+    perfil = cProfile.Profile() if ruta_cprofile else None
+
+    activar()
+
+    if perfil is not None:
+        perfil.enable()
+
+    try:
+        with etapa("total"):
+            yield
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            perfil.dump_stats(ruta_cprofile)
+
+        desactivar()
+
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(reporte(script), archivo, indent=4, ensure_ascii=False)
+
+        print("Perfil guardado:", ruta)
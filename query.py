@@ -0,0 +1,320 @@
+"""
+Este script permite consultar la base de datos de Cuenta Pública
+sin cargar todas sus columnas ni todas sus filas.
+
+Las consultas se construyen encadenando filtros, por ejemplo:
+
+    consulta = (
+        CuentaPublica()
+        .ciclos(2019, 2023)
+        .etapa("Ejercicio")
+        .ramo("Instituto Nacional Electoral")
+        .medidas("TOTAL")
+    )
+
+    consulta.sumar_por("CICLO")
+
+Los filtros y las columnas se aplican al leer el dataset columnar
+(ver columnar.py): solo se leen las columnas necesarias y, como las filas
+están ordenadas por ciclo, solo el rango de filas de los años consultados.
+Los demás filtros se evalúan sobre los códigos de las categorías antes
+de copiar cualquier fila.
+
+Si el dataset columnar no existe se usa data.csv, del cual
+solo se leen las columnas necesarias.
+"""
+
+import copy
+import os
+
+import numpy as np
+
+import schema
+from columnar import cargar_columnar
+from loader import cargar
+
+DIMENSIONES = [
+    "CICLO",
+    "ENTE",
+    "RAMO",
+    "PROGRAMA",
+    "DESCRIPCIÓN",
+    "PRESUPUESTO",
+]
+
+
+def abrir_columnar(ruta_esquema):
+    """
+    Abre el dataset columnar del archivo de esquema especificado.
+
+    Los arreglos se mapean en memoria, por lo cual abrir todas
+    las columnas no lee su contenido.
+
+    Returns
+    =======
+    pandas.DataFrame
+        El dataset con todas sus columnas.
+
+    bool
+        True si las filas están ordenadas por ciclo.
+
+    """
+
+    df = cargar_columnar(os.path.dirname(ruta_esquema))
+
+    codigos = df["CICLO"].cat.codes.to_numpy()
+
+    return df, bool((codigos[:-1] <= codigos[1:]).all())
+
+
+class CuentaPublica:
+    """
+    Consulta sobre el desglose por programa de Cuenta Pública.
+
+    Cada filtro regresa una nueva consulta, la consulta original no se modifica.
+    Llamar un filtro otra vez reemplaza su valor anterior.
+
+    Parameters
+    ==========
+    ruta : str
+        La carpeta del dataset columnar.
+
+    ruta_csv : str
+        El archivo CSV que se usa si no existe el dataset columnar.
+
+    """
+
+    def __init__(self, ruta="./data_columnar", ruta_csv="./data.csv"):
+        self.ruta = ruta
+        self.ruta_csv = ruta_csv
+        self.rango = None
+        self.filtros = dict()
+        self.columnas_medidas = None
+
+    def _con(self, **cambios):
+        """
+        Regresa una copia de la consulta con los cambios especificados.
+        """
+
+        consulta = copy.copy(self)
+        consulta.filtros = dict(self.filtros)
+        consulta.__dict__.update(cambios)
+
+        return consulta
+
+    def _filtrar(self, columna, valores):
+        """
+        Regresa una copia de la consulta que solo incluye los valores especificados.
+        """
+
+        if not valores:
+            raise ValueError(f"Se debe especificar al menos un valor de {columna}.")
+
+        consulta = self._con()
+        consulta.filtros[columna] = tuple(valores)
+
+        return consulta
+
+    def ciclos(self, desde, hasta=None):
+        """
+        Selecciona los años del rango especificado, incluyendo ambos extremos.
+        Si no se especifica el final solo se selecciona el año inicial.
+        """
+
+        hasta = desde if hasta is None else hasta
+
+        if desde > hasta:
+            raise ValueError(f"Rango de años no válido: {desde}-{hasta}")
+
+        return self._con(rango=(int(desde), int(hasta)))
+
+    def etapa(self, *etapas):
+        """
+        Selecciona las etapas del presupuesto, por ejemplo: Aprobado o Ejercicio.
+        """
+
+        for valor in etapas:
+            if valor not in schema.TIPOS_PRESUPUESTO:
+                raise ValueError(f"Etapa del presupuesto no soportada: {valor}")
+
+        return self._filtrar("PRESUPUESTO", etapas)
+
+    def ente(self, *nombres):
+        """
+        Selecciona los entes especificados, por ejemplo: Poder Legislativo.
+        """
+
+        return self._filtrar("ENTE", nombres)
+
+    def ramo(self, *nombres):
+        """
+        Selecciona los ramos especificados, por ejemplo: Instituto Nacional Electoral.
+        """
+
+        return self._filtrar("RAMO", nombres)
+
+    def programa(self, *claves):
+        """
+        Selecciona los programas por su clave, por ejemplo: K027.
+        """
+
+        return self._filtrar("PROGRAMA", claves)
+
+    def descripcion(self, *descripciones):
+        """
+        Selecciona los programas por su descripción exacta.
+        Para buscar por partes del texto ver search.py.
+        """
+
+        return self._filtrar("DESCRIPCIÓN", descripciones)
+
+    def medidas(self, *medidas):
+        """
+        Selecciona las columnas de cifras, por ejemplo: TOTAL o GC_SUMA.
+        Si no se especifican se incluyen todas.
+        """
+
+        for medida in medidas:
+            if medida not in schema.MEDIDAS:
+                raise ValueError(f"Medida no soportada: {medida}")
+
+        return self._con(columnas_medidas=list(medidas) or None)
+
+    # Nombres en inglés de los mismos métodos.
+    years = ciclos
+    stage = etapa
+    measures = medidas
+
+    def tabla(self, dimensiones=None):
+        """
+        Ejecuta la consulta.
+
+        Parameters
+        ==========
+        dimensiones : list
+            Las columnas de etiquetas a incluir. Si no se especifican
+            se incluyen todas.
+
+        Returns
+        =======
+        pandas.DataFrame
+            Las filas seleccionadas con las dimensiones y las medidas
+            de la consulta. El índice es el número de fila en data.csv
+        """
+
+        dimensiones = DIMENSIONES if dimensiones is None else list(dimensiones)
+        medidas = self.columnas_medidas or schema.MEDIDAS
+
+        columnas = dimensiones + [m for m in medidas if m not in dimensiones]
+
+        # Las medidas derivadas (ver schema.Derivadas) no se guardan,
+        # se calculan después de filtrar con las columnas de las que dependen.
+        leidas = [c for c in columnas if not schema.es_derivada(c)]
+
+        for columna in columnas:
+            if schema.es_derivada(columna):
+                leidas += [c for c in schema.dependencias(columna) if c not in leidas]
+
+        necesarias = set(leidas) | set(self.filtros)
+
+        if self.rango is not None:
+            necesarias.add("CICLO")
+
+        esquema = os.path.join(self.ruta, "esquema.json")
+
+        if os.path.exists(esquema):
+            df, ordenado = cargar(esquema, lector=abrir_columnar)
+        else:
+            df = cargar(
+                self.ruta_csv,
+                columnas=[c for c in DIMENSIONES if c in necesarias]
+                + [c for c in schema.MEDIDAS if c in necesarias],
+            )
+            ordenado = False
+
+        inicio, fin, mascara = self._seleccion(df, ordenado)
+
+        resultado = df.iloc[inicio:fin][leidas]
+
+        if mascara is not None:
+            resultado = resultado[mascara]
+
+        resultado = resultado.derivadas.agregar(
+            *[c for c in columnas if c not in leidas]
+        )[columnas]
+
+        # En el dataset columnar el ciclo se guarda como categoría,
+        # lo regresamos con el tipo del esquema.
+        if "CICLO" in columnas and resultado["CICLO"].dtype == "category":
+            resultado = resultado.astype({"CICLO": schema.TIPOS["CICLO"]})
+
+        return resultado
+
+    def _seleccion(self, df, ordenado):
+        """
+        Regresa el rango de filas de los años consultados y la máscara
+        de los demás filtros dentro de ese rango.
+        """
+
+        inicio, fin = 0, len(df)
+        mascara = None
+
+        if self.rango is not None:
+            desde, hasta = self.rango
+            ciclos = df["CICLO"]
+
+            if ciclos.dtype == "category":
+                # Comparamos los códigos, las categorías del ciclo están ordenadas.
+                categorias = ciclos.cat.categories
+                valores = ciclos.cat.codes.to_numpy()
+                desde = categorias.searchsorted(desde, "left")
+                hasta = categorias.searchsorted(hasta, "right") - 1
+            else:
+                valores = ciclos.to_numpy()
+
+            if ordenado:
+                inicio = int(valores.searchsorted(desde, "left"))
+                fin = int(valores.searchsorted(hasta, "right"))
+            else:
+                mascara = (valores >= desde) & (valores <= hasta)
+
+        for columna, seleccion in self.filtros.items():
+            categorias = df[columna].cat.categories
+            codigos = df[columna].cat.codes.to_numpy()[inicio:fin]
+
+            # Los valores que no existen en el dataset no seleccionan ninguna fila.
+            permitidos = categorias.get_indexer(list(seleccion))
+            coincide = np.isin(codigos, permitidos[permitidos >= 0])
+
+            mascara = coincide if mascara is None else mascara & coincide
+
+        return inicio, fin, mascara
+
+    def sumar_por(self, *dimensiones):
+        """
+        Suma las medidas de la consulta agrupando por las dimensiones especificadas.
+
+        Los porcentajes no se pueden sumar, por lo cual si no se especificaron
+        medidas solo se suman las cifras en pesos (schema.MONTOS).
+
+        Returns
+        =======
+        pandas.DataFrame
+            Una fila por cada combinación de dimensiones que existe en la consulta.
+
+        """
+
+        if not dimensiones:
+            raise ValueError("Se debe especificar al menos una dimensión.")
+
+        medidas = self.columnas_medidas or schema.MONTOS
+
+        for medida in medidas:
+            if medida in schema.PORCENTAJES:
+                raise ValueError(f"Los porcentajes no se pueden sumar: {medida}")
+
+        df = self.medidas(*medidas).tabla(dimensiones)
+
+        return df.groupby(list(dimensiones), observed=True)[medidas].sum()
+
+    sum_by = sumar_por
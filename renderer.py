@@ -0,0 +1,315 @@
+"""
+Este script exporta las gráficas a imágenes usando varios procesos a la vez.
+
+Cada proceso mantiene abierto su propio Kaleido (Chromium), así solo
+se paga el costo de iniciarlo una vez por proceso y no una vez por gráfica.
+
+Ejemplo:
+
+    with Renderizador(procesos=4) as renderizador:
+        renderizador.enviar(fig, "./1.png")
+        renderizador.enviar(fig2, "./2.png")
+
+    # Al salir del bloque se esperan todas las gráficas pendientes.
+
+Las imágenes exportadas se guardan en una caché en disco. Si una figura
+no cambió (sus datos, su diseño, su tamaño y su formato), se copia
+la imagen de la caché en lugar de volver a exportarla.
+"""
+
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly
+import plotly.io as pio
+
+RUTA_CACHE = "./.cache_graficas"
+
+# El tamaño máximo de la caché en bytes.
+LIMITE_CACHE = 256 * 1024 * 1024
+
+
+def iniciar_proceso():
+    """
+    Prepara Kaleido en cada proceso nuevo exportando una gráfica vacía.
+    """
+
+    try:
+        import kaleido
+    except ImportError:
+        return
+
+    # Primero confirmamos que Kaleido encuentra Chrome, si no es así
+    # el error se reportará con la primera gráfica.
+    try:
+        pio.to_image({"data": [], "layout": {}}, format="png", width=10, height=10)
+    except Exception:
+        return
+
+    # Desde Kaleido 1.0 el navegador se puede mantener abierto
+    # entre exportaciones con un servidor síncrono.
+    if hasattr(kaleido, "start_sync_server"):
+        kaleido.start_sync_server(silence_warnings=True)
+
+
+def exportar_figura(figura, ruta, formato, escala):
+    """
+    Exporta una figura a la ruta especificada.
+    Esta función se ejecuta dentro de los procesos del Renderizador.
+    """
+
+    pio.write_image(figura, ruta, format=formato, scale=escala, validate=False)
+
+    return ruta
+
+
+class CacheGraficas:
+    """
+    Caché en disco de las imágenes exportadas.
+
+    Cada imagen se identifica por la huella de su figura, así
+    una figura que no cambió no se vuelve a exportar.
+    Cuando la caché supera su límite se borran las imágenes
+    que tienen más tiempo sin usarse.
+
+    Parameters
+    ==========
+    ruta : str
+        La carpeta de la caché.
+
+    limite : int
+        El tamaño máximo de la caché en bytes.
+
+    """
+
+    def __init__(self, ruta=RUTA_CACHE, limite=LIMITE_CACHE):
+        self.ruta = ruta
+        self.limite = limite
+
+    def huella(self, figura, formato, escala):
+        """
+        Calcula la huella de la figura, su formato y su escala.
+
+        La figura debe estar como diccionario. También se incluyen
+        la versión de Plotly y la plantilla por defecto, ya que
+        cambian la imagen resultante.
+        """
+
+        contenido = pio.json.to_json_plotly(
+            [figura, formato, escala, plotly.__version__, pio.templates.default]
+        )
+
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def archivo(self, huella, formato):
+        """
+        Regresa la ruta de la imagen en la caché.
+        """
+
+        return os.path.join(self.ruta, f"{huella}.{formato}")
+
+    def recuperar(self, huella, formato, ruta):
+        """
+        Copia la imagen de la caché a la ruta especificada.
+        Regresa False si la imagen no está en la caché.
+        """
+
+        archivo = self.archivo(huella, formato)
+
+        try:
+            shutil.copyfile(archivo, ruta)
+        except FileNotFoundError:
+            return False
+
+        # Actualizamos la fecha para saber cuáles imágenes se usan.
+        os.utime(archivo)
+
+        return True
+
+    def guardar(self, huella, formato, ruta):
+        """
+        Guarda una copia de la imagen exportada en la caché.
+        """
+
+        os.makedirs(self.ruta, exist_ok=True)
+
+        # Copiamos a un archivo temporal para no dejar imágenes incompletas.
+        archivo = self.archivo(huella, formato)
+        temporal = f"{archivo}.{os.getpid()}.tmp"
+
+        shutil.copyfile(ruta, temporal)
+        os.replace(temporal, archivo)
+
+        self.recortar()
+
+    def recortar(self):
+        """
+        Borra las imágenes más antiguas hasta que la caché quepa en su límite.
+        """
+
+        imagenes = list()
+
+        with os.scandir(self.ruta) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                    estado = entrada.stat()
+                    imagenes.append((estado.st_mtime_ns, estado.st_size, entrada.path))
+
+        total = sum(tamaño for _, tamaño, _ in imagenes)
+
+        for _, tamaño, archivo in sorted(imagenes):
+            if total <= self.limite:
+                break
+
+            os.remove(archivo)
+            total -= tamaño
+
+
+def exportar_con_cache(fig, ruta, formato="png", escala=1, cache=None):
+    """
+    Exporta la figura en este mismo proceso, usando la caché si es posible.
+
+    Returns
+    =======
+    bool
+        True si se exportó la imagen, False si se copió de la caché.
+
+    """
+
+    cache = cache or CacheGraficas()
+
+    figura = fig if isinstance(fig, dict) else fig.to_plotly_json()
+    huella = cache.huella(figura, formato, escala)
+
+    if cache.recuperar(huella, formato, ruta):
+        return False
+
+    exportar_figura(figura, ruta, formato, escala)
+    cache.guardar(huella, formato, ruta)
+
+    return True
+
+
+class Renderizador:
+    """
+    Cola de gráficas que se exportan en paralelo con procesos persistentes.
+
+    Parameters
+    ==========
+    procesos : int
+        El número de procesos. Si no se especifica se usa uno por núcleo.
+
+    formato : str
+        El formato de las imágenes, por ejemplo: png, jpg, svg o pdf.
+
+    escala : float
+        El factor de escala de las imágenes.
+
+    cache : CacheGraficas
+        La caché de imágenes. Si no se especifica se usa la carpeta RUTA_CACHE,
+        con False se exportan todas las figuras.
+
+    """
+
+    def __init__(self, procesos=None, formato="png", escala=1, cache=None):
+        self.formato = formato
+        self.escala = escala
+        self.cache = CacheGraficas() if cache is None else cache or None
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=procesos or os.cpu_count() or 1,
+            initializer=iniciar_proceso,
+        )
+
+        self.pendientes = list()
+
+    def enviar(self, fig, ruta, formato=None, escala=None):
+        """
+        Agrega una figura a la cola de exportación.
+
+        Parameters
+        ==========
+        fig : plotly.graph_objects.Figure o dict
+            La figura a exportar.
+
+        ruta : str
+            La ruta de la imagen.
+
+        formato : str
+            El formato de esta imagen. Si no se especifica se usa el del Renderizador.
+
+        escala : float
+            La escala de esta imagen. Si no se especifica se usa la del Renderizador.
+
+        """
+
+        formato = formato or self.formato
+        escala = escala or self.escala
+
+        # Enviamos la figura como diccionario, es más ligero de serializar.
+        figura = fig if isinstance(fig, dict) else fig.to_plotly_json()
+
+        huella = None
+
+        if self.cache is not None:
+            huella = self.cache.huella(figura, formato, escala)
+
+            if self.cache.recuperar(huella, formato, ruta):
+                self.pendientes.append((ruta, None, huella, formato))
+                return
+
+        futuro = self.executor.submit(exportar_figura, figura, ruta, formato, escala)
+
+        self.pendientes.append((ruta, futuro, huella, formato))
+
+    def esperar(self):
+        """
+        Espera a que terminen todas las figuras enviadas.
+
+        Returns
+        =======
+        dict
+            Las rutas de las figuras que no se pudieron exportar y su error.
+
+        """
+
+        errores = dict()
+
+        for ruta, futuro, huella, formato in self.pendientes:
+            if futuro is None:
+                print("Sin cambios:", ruta)
+                continue
+
+            try:
+                futuro.result()
+
+                # La caché se actualiza solo desde este proceso.
+                if huella is not None:
+                    self.cache.guardar(huella, formato, ruta)
+
+                print("Exportado:", ruta)
+            except Exception as e:
+                errores[ruta] = e
+                print("Error:", ruta, repr(e))
+
+        self.pendientes.clear()
+
+        return errores
+
+    def cerrar(self):
+        """
+        Espera las figuras pendientes y termina los procesos.
+        """
+
+        errores = self.esperar()
+        self.executor.shutdown()
+
+        return errores
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
@@ -0,0 +1,516 @@
+"""
+Este script define el esquema de la base de datos de Cuenta Pública.
+
+Todos los archivos CSV (los de cada ciclo, data.csv y data_total.csv)
+se cargan usando los mismos tipos de datos, así no es necesario que
+Pandas los infiera en cada lectura.
+
+Las columnas de etiquetas (ente, ramo, programa, etc.) se repiten
+en miles de filas, por lo cual se cargan como categorías.
+
+Los montos también se pueden guardar como centavos enteros
+(ver a_centavos), así las sumas son exactas y no dependen
+del orden en que se realizan.
+
+Las sumas (GC_SUMA y GI_SUMA) y los porcentajes se pueden calcular
+a partir de las demás columnas, por lo cual no se guardan en los
+archivos compilados. Se calculan solo cuando se necesitan (ver Derivadas).
+"""
+
+import numpy as np
+import pandas as pd
+
+TIPOS_PRESUPUESTO = [
+    "Aprobado",
+    "Modificado",
+    "Devengado",
+    "Ejercicio",
+    "Porcentaje Ejer/Aprob",
+    "Porcentaje Ejer/Modif",
+]
+
+# Las etapas del presupuesto, en el orden en que aparecen en cada partida.
+ETAPAS = [
+    "Aprobado",
+    "Modificado",
+    "Devengado",
+    "Ejercicio",
+]
+
+COLUMNAS_ETIQUETA = [
+    "ENTE",
+    "RAMO",
+    "SUBRAMO",
+    "PROGRAMA",
+    "DESCRIPCIÓN",
+    "PRESUPUESTO",
+]
+
+MONTOS = [
+    "GC_SERVICIOS_PERSONALES",
+    "GC_GASTO_DE_OPERACIÓN",
+    "GC_SUBSIDIOS",
+    "GC_OTROS_DE_CORRIENTE",
+    "GC_SUMA",
+    "GI_PENSIONES_Y_JUBILACIONES",
+    "GI_INVERSIÓN_FÍSICA",
+    "GI_SUBSIDIOS",
+    "GI_OTROS_DE_INVERSIÓN",
+    "GI_SUMA",
+    "TOTAL",
+]
+
+PORCENTAJES = [
+    "PORCENTAJE_CORRIENTE",
+    "PORCENTAJE_PENSIONES_Y_JUBILACIONES",
+    "PORCENTAJE_INVERSIÓN",
+]
+
+MEDIDAS = MONTOS + PORCENTAJES
+
+# Las columnas que forman cada suma.
+# Desde el 2016 las pensiones y jubilaciones vienen en su propia columna,
+# no forman parte de GI_SUMA pero sí del TOTAL.
+SUMAS = {
+    "GC_SUMA": [
+        "GC_SERVICIOS_PERSONALES",
+        "GC_GASTO_DE_OPERACIÓN",
+        "GC_SUBSIDIOS",
+        "GC_OTROS_DE_CORRIENTE",
+    ],
+    "GI_SUMA": [
+        "GI_INVERSIÓN_FÍSICA",
+        "GI_SUBSIDIOS",
+        "GI_OTROS_DE_INVERSIÓN",
+    ],
+}
+
+# El numerador de cada porcentaje, el denominador siempre es el TOTAL.
+NUMERADORES = {
+    "PORCENTAJE_CORRIENTE": "GC_SUMA",
+    "PORCENTAJE_PENSIONES_Y_JUBILACIONES": "GI_PENSIONES_Y_JUBILACIONES",
+    "PORCENTAJE_INVERSIÓN": "GI_SUMA",
+}
+
+# Las medidas que se calculan a partir de otras columnas.
+DERIVADAS = list(SUMAS) + list(NUMERADORES)
+
+# Los archivos de Cuenta Pública no siempre usan la misma convención para
+# las cifras que no se pueden calcular. Las derivadas siguen la de cada ciclo:
+# en estos ciclos una suma sin ninguna de sus partes viene vacía, no en 0.
+CICLOS_SUMA_VACIA = [2013]
+
+# En estos ciclos un porcentaje con TOTAL en 0 viene vacío, no en 0.
+CICLOS_PORCENTAJE_VACIO = [2013, 2014]
+
+# Las medidas que se guardan en los archivos compilados.
+MEDIDAS_GUARDADAS = [medida for medida in MEDIDAS if medida not in DERIVADAS]
+
+COLUMNAS_PROGRAMAS = [
+    "CICLO",
+    "ENTE",
+    "RAMO",
+    "PROGRAMA",
+    "DESCRIPCIÓN",
+    "PRESUPUESTO",
+] + MEDIDAS_GUARDADAS
+
+COLUMNAS_TOTALES = [
+    "CICLO",
+    "ENTE",
+    "RAMO",
+    "PRESUPUESTO",
+] + MEDIDAS_GUARDADAS
+
+TIPOS = {
+    "CICLO": "int16",
+    **{columna: "category" for columna in COLUMNAS_ETIQUETA},
+    **{columna: "float64" for columna in MEDIDAS},
+    **{
+        f"{etapa.upper()}_{columna}": "float64"
+        for etapa in ETAPAS
+        for columna in MEDIDAS
+    },
+}
+
+
+def separar_medida(columna):
+    """
+    Separa el prefijo de la etapa y la medida de una columna,
+    por ejemplo: APROBADO_GC_SUMA regresa ("APROBADO_", "GC_SUMA")
+    y TOTAL regresa ("", "TOTAL").
+
+    Si la columna no es una medida regresa None como medida.
+    """
+
+    if columna in MEDIDAS:
+        return "", columna
+
+    etapa, _, medida = columna.partition("_")
+
+    if etapa.capitalize() in ETAPAS and medida in MEDIDAS:
+        return f"{etapa}_", medida
+
+    return "", None
+
+
+def es_derivada(columna):
+    """
+    Regresa True si la columna se calcula a partir de otras columnas.
+    """
+
+    return separar_medida(columna)[1] in DERIVADAS
+
+
+def dependencias(columna):
+    """
+    Regresa las columnas guardadas que se necesitan para calcular la columna.
+    """
+
+    prefijo, medida = separar_medida(columna)
+
+    # El ciclo define cómo se calculan las cifras vacías (ver CICLOS_SUMA_VACIA).
+    if medida in SUMAS:
+        return [f"{prefijo}{parte}" for parte in SUMAS[medida]] + ["CICLO"]
+
+    if medida in NUMERADORES:
+        numerador = dependencias(f"{prefijo}{NUMERADORES[medida]}")
+
+        return [c for c in numerador if c != "CICLO"] + [f"{prefijo}TOTAL", "CICLO"]
+
+    return [columna]
+
+
+@pd.api.extensions.register_dataframe_accessor("derivadas")
+class Derivadas:
+    """
+    Calcula las medidas derivadas (ver DERIVADAS) de un DataFrame.
+
+    Cada columna se calcula la primera vez que se usa y se guarda junto
+    al DataFrame. Como loader.py comparte el mismo DataFrame entre
+    todas las consultas, cada columna se calcula una sola vez por archivo.
+    Por lo mismo, el DataFrame no debe modificarse después de calcularlas.
+
+    Ejemplo:
+
+        df["GC_SUMA"] -> df.derivadas["GC_SUMA"]
+        df = df.derivadas.agregar("PORCENTAJE_CORRIENTE")
+
+    Las celdas vacías y los ceros siguen la convención de los archivos
+    originales de cada ciclo:
+
+    - Las sumas tratan las partes vacías como 0. Si todas están vacías,
+      la suma queda vacía en CICLOS_SUMA_VACIA y en 0 en los demás ciclos.
+    - Los porcentajes con TOTAL en 0 quedan vacíos en CICLOS_PORCENTAJE_VACIO
+      y en 0 en los demás ciclos.
+    - Los porcentajes cuyo numerador es una columna guardada vacía quedan
+      vacíos, por ejemplo: las pensiones antes del 2016. Si el numerador es
+      una suma vacía se usa 0.
+
+    Los porcentajes se calculan sin redondear. En algunos ciclos los archivos
+    originales los redondeaban a un decimal, por lo cual pueden diferir
+    de estos hasta en 0.05 puntos.
+    """
+
+    def __init__(self, df):
+        self._df = df
+
+        # Algunas versiones de pandas guardan el accessor en el DataFrame y
+        # otras (pandas 3) crean uno nuevo en cada acceso. Las columnas
+        # calculadas se guardan en el mismo DataFrame para que se compartan
+        # en ambos casos.
+        self._valores = df.__dict__.get("_derivadas")
+
+        if self._valores is None:
+            self._valores = dict()
+            object.__setattr__(df, "_derivadas", self._valores)
+
+    def __getitem__(self, columna):
+        if columna in self._df.columns:
+            return self._df[columna]
+
+        if not es_derivada(columna):
+            raise KeyError(columna)
+
+        if columna not in self._valores:
+            self._valores[columna] = pd.Series(
+                self._calcular(columna), index=self._df.index, name=columna
+            )
+
+        return self._valores[columna]
+
+    def _calcular(self, columna):
+        prefijo, medida = separar_medida(columna)
+
+        ciclos = self._df["CICLO"].to_numpy("int64")
+
+        if medida in SUMAS:
+            partes = [self[f"{prefijo}{parte}"] for parte in SUMAS[medida]]
+
+            vacias = np.logical_and.reduce(
+                [parte.isna().to_numpy() for parte in partes]
+            ) & np.isin(ciclos, CICLOS_SUMA_VACIA)
+
+            # Los centavos se suman como enteros, así la suma es exacta.
+            if all(isinstance(parte.dtype, pd.Int64Dtype) for parte in partes):
+                suma = pd.array(
+                    sum(parte.to_numpy("int64", na_value=0) for parte in partes),
+                    dtype="Int64",
+                )
+                suma[vacias] = pd.NA
+
+                return suma
+
+            suma = sum(
+                np.nan_to_num(parte.to_numpy("float64", na_value=np.nan))
+                for parte in partes
+            )
+
+            return np.where(vacias, np.nan, suma)
+
+        nombre = NUMERADORES[medida]
+        numerador = self[f"{prefijo}{nombre}"].to_numpy("float64", na_value=np.nan)
+        total = self[f"{prefijo}TOTAL"].to_numpy("float64", na_value=np.nan)
+
+        if nombre in SUMAS:
+            numerador = np.nan_to_num(numerador)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            porcentaje = numerador / total * 100
+
+        cero = np.where(np.isin(ciclos, CICLOS_PORCENTAJE_VACIO), np.nan, 0.0)
+
+        return np.where(
+            total == 0, np.where(np.isnan(numerador), numerador, cero), porcentaje
+        )
+
+    def disponibles(self):
+        """
+        Regresa las columnas derivadas que se pueden calcular
+        y que no existen en el DataFrame.
+        """
+
+        prefijos = [""] + [f"{etapa.upper()}_" for etapa in ETAPAS]
+
+        return [
+            f"{prefijo}{medida}"
+            for prefijo in prefijos
+            for medida in DERIVADAS
+            if f"{prefijo}{medida}" not in self._df.columns
+            and all(
+                columna in self._df.columns
+                for columna in dependencias(f"{prefijo}{medida}")
+            )
+        ]
+
+    def agregar(self, *columnas):
+        """
+        Regresa una copia del DataFrame con las columnas derivadas especificadas.
+        Si no se especifican se agregan todas las que se pueden calcular.
+        """
+
+        columnas = columnas or self.disponibles()
+
+        return self._df.assign(
+            **{
+                columna: self[columna]
+                for columna in columnas
+                if columna not in self._df.columns
+            }
+        )
+
+
+def es_monto(columna):
+    """
+    Regresa True si la columna es un monto en pesos, por ejemplo:
+    TOTAL, GC_SUMA o APROBADO_TOTAL.
+    """
+
+    if columna in MONTOS:
+        return True
+
+    etapa, _, medida = columna.partition("_")
+
+    return etapa.capitalize() in ETAPAS and medida in MONTOS
+
+
+def a_centavos(df):
+    """
+    Convierte los montos de pesos a centavos enteros.
+
+    Las celdas vacías se conservan como nulas (tipo Int64).
+    Las demás columnas no se modifican.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con los montos en pesos.
+
+    Returns
+    =======
+    pandas.DataFrame
+        Una copia del DataFrame con los montos en centavos.
+
+    """
+
+    return df.assign(
+        **{
+            columna: pd.array(
+                np.round(df[columna].to_numpy(dtype="float64") * 100), dtype="Int64"
+            )
+            for columna in df.columns
+            if es_monto(columna)
+        }
+    )
+
+
+def a_pesos(df):
+    """
+    Convierte los montos de centavos enteros a pesos (float64).
+    Las celdas nulas se convierten en NaN.
+    """
+
+    return df.assign(
+        **{
+            columna: df[columna].to_numpy(dtype="float64", na_value=np.nan) / 100
+            for columna in df.columns
+            if es_monto(columna)
+        }
+    )
+
+
+def leer_csv(ruta, columnas=None, categorias=True, centavos=False):
+    """
+    Carga un archivo CSV de Cuenta Pública con los tipos de datos del esquema.
+
+    Parameters
+    ==========
+    ruta : str
+        La ruta del archivo CSV.
+
+    columnas : list
+        Las columnas a cargar. Si no se especifica se cargan todas.
+        Las demás columnas no se leen del archivo.
+        Las columnas derivadas que no existen en el archivo
+        se calculan (ver Derivadas).
+
+    categorias : bool
+        Si es False, las columnas de etiquetas se cargan como texto.
+        Esto es útil cuando se van a modificar sus valores.
+
+    centavos : bool
+        Si es True, el archivo tiene los montos en centavos enteros
+        (por ejemplo: data_centavos.csv) y se cargan como Int64.
+        Para convertirlos a pesos ver a_pesos().
+
+    Returns
+    =======
+    pandas.DataFrame
+        El DataFrame con los tipos de datos del esquema.
+
+    """
+
+    tipos = {
+        columna: tipo
+        for columna, tipo in TIPOS.items()
+        if categorias or tipo != "category"
+    }
+
+    leidas = None
+
+    if columnas is not None:
+        # Leemos las columnas que existan en el archivo y
+        # las que se necesitan para calcular las derivadas.
+        leidas = set(columnas).union(
+            *(dependencias(columna) for columna in columnas if es_derivada(columna))
+        )
+
+    # En algunos ciclos las celdas vacías vienen como un espacio en blanco
+    # y las cifras no significativas como "n.s.".
+    # Con round_trip las cifras se leen exactamente como fueron escritas.
+    # Los archivos en centavos solo tienen enteros, los cuales
+    # se leen exactos con el lector por defecto, que es más rápido.
+    df = pd.read_csv(
+        ruta,
+        usecols=None if leidas is None else leidas.__contains__,
+        dtype=tipos,
+        na_values={columna: [" ", "n.s."] for columna in MEDIDAS},
+        float_precision=None if centavos else "round_trip",
+    )
+
+    if centavos:
+        # Es más rápido leer los centavos como float64 y convertirlos
+        # que leerlos como Int64. Los enteros menores a 2^53 se leen exactos.
+        df = df.assign(
+            **{
+                columna: pd.array(df[columna].to_numpy(), dtype="Int64")
+                for columna in df.columns
+                if es_monto(columna)
+            }
+        )
+
+    if columnas is not None:
+        faltantes = [columna for columna in columnas if columna not in df.columns]
+
+        for columna in faltantes:
+            if not es_derivada(columna):
+                raise ValueError(f"La columna no existe en {ruta}: {columna}")
+
+        # Quitamos las columnas que solo se leyeron para calcular las derivadas.
+        columnas = set(columnas)
+        df = df.derivadas.agregar(*faltantes)
+        df = df[[columna for columna in df.columns if columna in columnas]]
+
+    return df
+
+
+def a_etapas(df):
+    """
+    Convierte un DataFrame con una fila por etapa del presupuesto
+    (columna PRESUPUESTO) a uno con una sola fila por partida.
+
+    Cada medida se convierte en una columna por etapa, por ejemplo:
+    TOTAL se convierte en APROBADO_TOTAL, MODIFICADO_TOTAL, DEVENGADO_TOTAL
+    y EJERCICIO_TOTAL.
+
+    Las filas de cada partida siempre vienen juntas y en el orden de ETAPAS,
+    por lo cual no es necesario agrupar. Esto también conserva las partidas
+    que tienen las mismas etiquetas que otra.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con el formato de data.csv o data_total.csv
+
+    Returns
+    =======
+    pandas.DataFrame
+        El DataFrame con una fila por partida.
+
+    """
+
+    presupuestos = df["PRESUPUESTO"].to_numpy(dtype="object")
+
+    if (
+        len(presupuestos) % len(ETAPAS) != 0
+        or not (presupuestos.reshape(-1, len(ETAPAS)) == ETAPAS).all()
+    ):
+        raise ValueError("Las filas no están agrupadas por partida.")
+
+    dimensiones = [
+        columna
+        for columna in df.columns
+        if columna not in MEDIDAS and columna != "PRESUPUESTO"
+    ]
+
+    medidas = [columna for columna in df.columns if columna in MEDIDAS]
+
+    etapas = df[dimensiones].iloc[:: len(ETAPAS)].reset_index(drop=True)
+
+    columnas = {
+        f"{etapa.upper()}_{columna}": df[columna].to_numpy()[i :: len(ETAPAS)]
+        for i, etapa in enumerate(ETAPAS)
+        for columna in medidas
+    }
+
+    return pd.concat([etapas, pd.DataFrame(columnas)], axis=1)
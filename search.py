@@ -0,0 +1,200 @@
+"""
+Este script crea índices para buscar programas por su descripción o clave.
+
+En lugar de recorrer todas las filas con str.contains(), se indexan
+los trigramas de cada texto distinto de la columna. Las búsquedas
+no distinguen mayúsculas, minúsculas ni acentos, por ejemplo:
+"vacunacion" encuentra "Programa de Vacunación".
+"""
+
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from loader import cargar
+from schema import leer_csv
+
+
+def normalizar_texto(texto):
+    """
+    Quita los acentos y convierte el texto a minúsculas.
+    """
+
+    descompuesto = unicodedata.normalize("NFKD", texto)
+
+    return "".join(
+        caracter for caracter in descompuesto if not unicodedata.combining(caracter)
+    ).casefold()
+
+
+def trigramas(texto):
+    """
+    Regresa el conjunto de trigramas (subcadenas de 3 caracteres) del texto.
+    """
+
+    return {texto[i : i + 3] for i in range(len(texto) - 2)}
+
+
+@lru_cache(maxsize=16)
+def indexar_textos(textos):
+    """
+    Normaliza los textos y crea el índice invertido de sus trigramas.
+
+    El resultado se guarda en caché, ya que los mismos textos
+    se indexan cada vez que se carga el mismo dataset.
+
+    Parameters
+    ==========
+    textos : tuple
+        Los textos distintos de la columna.
+
+    Returns
+    =======
+    list
+        Los textos normalizados.
+
+    dict
+        Los códigos de los textos que contienen cada trigrama.
+
+    """
+
+    normalizados = [normalizar_texto(texto) for texto in textos]
+
+    indice = dict()
+
+    for codigo, texto in enumerate(normalizados):
+        for trigrama in trigramas(texto):
+            indice.setdefault(trigrama, set()).add(codigo)
+
+    return normalizados, indice
+
+
+class IndiceTexto:
+    """
+    Índice invertido de trigramas sobre los textos distintos de una columna.
+
+    Los textos se identifican por su código de categoría, así una búsqueda
+    solo revisa los textos distintos y no cada una de las filas.
+    """
+
+    def __init__(self, columna):
+        categorias = pd.Categorical(columna)
+
+        self.textos = tuple(categorias.categories.astype(str))
+        self.normalizados, self.trigramas = indexar_textos(self.textos)
+
+        # Agrupamos las filas por código, así las filas de cada
+        # texto son un rango continuo de self.orden.
+        codigos = categorias.codes
+        self.orden = np.argsort(codigos, kind="stable")
+        self.limites = np.searchsorted(
+            codigos[self.orden], np.arange(len(self.textos) + 1)
+        )
+
+    def buscar(self, consulta):
+        """
+        Regresa los códigos de los textos que contienen la consulta.
+
+        Parameters
+        ==========
+        consulta : str
+            El texto a buscar, sin importar mayúsculas ni acentos.
+
+        Returns
+        =======
+        list
+            Los códigos de categoría de los textos encontrados.
+
+        """
+
+        consulta = normalizar_texto(consulta)
+
+        if len(consulta) < 3:
+            candidatos = range(len(self.normalizados))
+        else:
+            # Los candidatos son los textos que tienen todos los trigramas
+            # de la consulta. Empezamos por el trigrama menos común.
+            listas = sorted(
+                (
+                    self.trigramas.get(trigrama, set())
+                    for trigrama in trigramas(consulta)
+                ),
+                key=len,
+            )
+
+            candidatos = set.intersection(*listas)
+
+        # Los trigramas no garantizan el orden, así que confirmamos cada candidato.
+        return sorted(
+            codigo for codigo in candidatos if consulta in self.normalizados[codigo]
+        )
+
+    def textos_encontrados(self, consulta):
+        """
+        Regresa los textos que contienen la consulta.
+        """
+
+        return [self.textos[codigo] for codigo in self.buscar(consulta)]
+
+    def filas(self, consulta):
+        """
+        Regresa las posiciones de las filas cuyo texto contiene la consulta.
+        """
+
+        codigos = self.buscar(consulta)
+
+        if not codigos:
+            return np.array([], dtype="int64")
+
+        return np.sort(
+            np.concatenate(
+                [
+                    self.orden[self.limites[codigo] : self.limites[codigo + 1]]
+                    for codigo in codigos
+                ]
+            )
+        )
+
+
+def construir_indices(df, columnas=("DESCRIPCIÓN", "PROGRAMA")):
+    """
+    Crea un índice de texto para cada una de las columnas especificadas.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con el formato de data.csv
+
+    columnas : tuple
+        Las columnas a indexar.
+
+    Returns
+    =======
+    dict
+        Un IndiceTexto por columna.
+
+    """
+
+    return {columna: IndiceTexto(df[columna]) for columna in columnas}
+
+
+def leer_indice(ruta, columna="DESCRIPCIÓN"):
+    """
+    Lee la columna especificada del archivo y regresa su IndiceTexto.
+
+    Las posiciones de las filas son las mismas que al cargar
+    el archivo completo con leer_csv().
+    """
+
+    return IndiceTexto(leer_csv(ruta, columnas=[columna])[columna])
+
+
+def cargar_indice(ruta, columna="DESCRIPCIÓN"):
+    """
+    Regresa el IndiceTexto de la columna usando la caché de loader.py,
+    así se crea una sola vez por archivo y se reutiliza en cada búsqueda.
+    """
+
+    return cargar(ruta, lector=leer_indice, columna=columna)
@@ -0,0 +1,573 @@
+"""
+Este script inicia un servidor HTTP local para consultar los totales
+de la base de datos de Cuenta Pública en formato JSON.
+
+El dataset se carga una sola vez (ver query.py y loader.py) y los
+resultados de cada consulta se guardan en una caché en memoria.
+Si el dataset o el archivo del IPC cambian, las siguientes consultas
+se calculan de nuevo con los archivos actualizados.
+
+El servidor no necesita conexión a internet y por defecto
+solo acepta conexiones del mismo equipo.
+
+Ejemplo:
+
+    python server.py --puerto 8000
+
+    http://127.0.0.1:8000/totales?por=CICLO&ciclos=2019-2023&etapa=Ejercicio&ramo=Bienestar
+    http://127.0.0.1:8000/totales?por=CICLO,RAMO&ente=Poder Legislativo&referencia=2023-12
+
+Parámetros de /totales:
+
+    por: las dimensiones separadas por comas, por ejemplo: CICLO,RAMO
+    ciclos: un año (2023) o un rango de años (2019-2023)
+    etapa, ente, ramo, programa, descripcion: los valores a seleccionar,
+        se pueden repetir para seleccionar varios, por ejemplo: etapa=Aprobado&etapa=Ejercicio
+    medidas: las medidas separadas por comas, por defecto TOTAL
+    referencia: ajusta las cifras por inflación al mes especificado, por ejemplo: 2023-12
+    base: cómo se elige el IPC de cada año: diciembre, enero o promedio
+
+    Los parámetros ciclos, referencia y base no se pueden repetir,
+    si se repiten la respuesta es un error 400.
+
+Parámetros de /arbol (ver tree.py):
+
+    ciclo, etapa: el árbol a recorrer, por ejemplo: ciclo=2023&etapa=Ejercicio
+    ente, ramo, programa: el nodo dentro del árbol, si no se especifican se usa la raíz
+    medidas: las medidas separadas por comas, por defecto TOTAL
+
+    Los parámetros ciclo, etapa, ente, ramo y programa no se pueden repetir.
+
+    http://127.0.0.1:8000/arbol?ciclo=2023&etapa=Ejercicio&ente=Ramos Administrativos
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from deflator import BASES, cargar_deflactor
+from query import DIMENSIONES, CuentaPublica
+from schema import MONTOS
+from tree import cargar_arbol
+
+# El número máximo de resultados que se mantienen en memoria.
+LIMITE = 1024
+
+FILTROS = {
+    "etapa": CuentaPublica.etapa,
+    "ente": CuentaPublica.ente,
+    "ramo": CuentaPublica.ramo,
+    "programa": CuentaPublica.programa,
+    "descripcion": CuentaPublica.descripcion,
+}
+
+ESTADOS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+def firma_archivo(ruta):
+    """
+    Regresa la fecha de modificación y el tamaño del archivo,
+    o None si no existe.
+    """
+
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+
+    return estado.st_mtime_ns, estado.st_size
+
+
+def separar(valor):
+    """
+    Separa un parámetro con valores separados por comas.
+    """
+
+    return [parte.strip() for parte in valor.split(",") if parte.strip()]
+
+
+def valor_unico(parametros, nombre, defecto=None):
+    """
+    Regresa el valor de un parámetro que no se puede repetir.
+    Si se repite se lanza un ValueError en lugar de usar solo el último.
+    """
+
+    valores = parametros.get(nombre, [defecto])
+
+    if len(valores) > 1:
+        raise ValueError(f"El parámetro no se puede repetir: {nombre}")
+
+    return valores[0]
+
+
+class ServicioTotales:
+    """
+    Calcula los totales de cada consulta y los guarda en una caché LRU.
+
+    Parameters
+    ==========
+    ruta : str
+        La carpeta del dataset columnar.
+
+    ruta_csv : str
+        El archivo CSV que se usa si no existe el dataset columnar.
+
+    ruta_ipc : str
+        El archivo del Índice de Precios al Consumidor.
+
+    ruta_arbol : str
+        El índice de la jerarquía (ver tree.py).
+
+    limite : int
+        El número máximo de resultados en la caché.
+
+    """
+
+    def __init__(
+        self,
+        ruta="./data_columnar",
+        ruta_csv="./data.csv",
+        ruta_ipc="./assets/IPC.csv",
+        ruta_arbol="./data_arbol.csv",
+        limite=LIMITE,
+    ):
+        self.ruta = ruta
+        self.ruta_csv = ruta_csv
+        self.ruta_ipc = ruta_ipc
+        self.ruta_arbol = ruta_arbol
+        self.limite = limite
+
+        self.cache = OrderedDict()
+        self.en_curso = dict()
+
+    def firma(self, ajustado):
+        """
+        Regresa la firma de los archivos que usa una consulta.
+        Si alguno cambia, los resultados anteriores ya no se usan.
+        """
+
+        firma = (
+            firma_archivo(os.path.join(self.ruta, "esquema.json")),
+            firma_archivo(self.ruta_csv),
+        )
+
+        if ajustado:
+            firma += (firma_archivo(self.ruta_ipc),)
+
+        return firma
+
+    def llave(self, parametros):
+        """
+        Regresa la llave de la caché de una consulta.
+        El orden de los parámetros no cambia la llave.
+        """
+
+        normalizados = tuple(
+            sorted((nombre, tuple(valores)) for nombre, valores in parametros.items())
+        )
+
+        return normalizados, self.firma("referencia" in parametros)
+
+    def consultar(self, parametros):
+        """
+        Calcula los totales de la consulta especificada.
+
+        Parameters
+        ==========
+        parametros : dict
+            Los parámetros de la consulta, cada uno con una lista de valores
+            (el formato de urllib.parse.parse_qs).
+
+        Returns
+        =======
+        dict
+            Las dimensiones, las medidas y una fila por cada grupo.
+
+        """
+
+        desconocidos = set(parametros) - {
+            "por",
+            "ciclos",
+            "medidas",
+            "referencia",
+            "base",
+            *FILTROS,
+        }
+
+        if desconocidos:
+            raise ValueError(
+                f"Parámetros no soportados: {', '.join(sorted(desconocidos))}"
+            )
+
+        por = separar(",".join(parametros.get("por", ["CICLO"])))
+
+        for dimension in por:
+            if dimension not in DIMENSIONES:
+                raise ValueError(f"Dimensión no soportada: {dimension}")
+
+        medidas = separar(",".join(parametros.get("medidas", ["TOTAL"])))
+
+        consulta = CuentaPublica(self.ruta, self.ruta_csv).medidas(*medidas)
+
+        ciclos = valor_unico(parametros, "ciclos")
+
+        if ciclos is not None:
+            desde, _, hasta = ciclos.partition("-")
+
+            try:
+                consulta = consulta.ciclos(int(desde), int(hasta or desde))
+            except ValueError:
+                raise ValueError(f"Rango de años no válido: {ciclos}") from None
+
+        for nombre, filtro in FILTROS.items():
+            if nombre in parametros:
+                consulta = filtro(consulta, *parametros[nombre])
+
+        df = consulta.sumar_por(*por).reset_index()
+
+        referencia = valor_unico(parametros, "referencia")
+        base = valor_unico(parametros, "base", "diciembre")
+
+        if referencia is not None:
+            if "CICLO" not in por:
+                raise ValueError(
+                    "Para ajustar por inflación se debe agrupar por CICLO."
+                )
+
+            if base not in BASES:
+                raise ValueError(f"Base no soportada: {base}")
+
+            df = cargar_deflactor(self.ruta_ipc).aplicar(
+                df, medidas, referencia, base, ciclo="CICLO"
+            )
+
+        filas = [
+            {
+                columna: (
+                    None if isinstance(valor, float) and math.isnan(valor) else valor
+                )
+                for columna, valor in fila.items()
+            }
+            for fila in df.to_dict("records")
+        ]
+
+        return {
+            "por": por,
+            "medidas": medidas,
+            "referencia": referencia,
+            "base": base if referencia is not None else None,
+            "filas": filas,
+        }
+
+    def consultar_arbol(self, parametros):
+        """
+        Regresa un nodo de la jerarquía junto con sus ancestros y sus hijos.
+
+        Los totales ya están precalculados, por lo cual la respuesta
+        solo depende del número de hijos del nodo y no se guarda en la caché.
+
+        Parameters
+        ==========
+        parametros : dict
+            Los parámetros de la consulta, cada uno con una lista de valores
+            (el formato de urllib.parse.parse_qs).
+
+        Returns
+        =======
+        dict
+            El nodo, sus ancestros desde la raíz y sus hijos.
+
+        """
+
+        desconocidos = set(parametros) - {
+            "ciclo",
+            "etapa",
+            "ente",
+            "ramo",
+            "programa",
+            "medidas",
+        }
+
+        if desconocidos:
+            raise ValueError(
+                f"Parámetros no soportados: {', '.join(sorted(desconocidos))}"
+            )
+
+        for nombre in ("ciclo", "etapa"):
+            if nombre not in parametros:
+                raise ValueError(f"Se debe especificar el parámetro: {nombre}")
+
+        medidas = separar(",".join(parametros.get("medidas", ["TOTAL"])))
+
+        for medida in medidas:
+            if medida not in MONTOS:
+                raise ValueError(f"Medida no soportada: {medida}")
+
+        arbol = cargar_arbol(self.ruta_arbol)
+
+        nodo = arbol.nodo(
+            *[
+                valor_unico(parametros, nombre)
+                for nombre in ("ciclo", "etapa", "ente", "ramo", "programa")
+            ]
+        )
+
+        return {
+            "medidas": medidas,
+            "nodo": arbol.datos(nodo, medidas),
+            "ancestros": [
+                arbol.datos(ancestro, medidas)
+                for ancestro in reversed(arbol.ancestros(nodo))
+            ],
+            "hijos": [arbol.datos(hijo, medidas) for hijo in arbol.hijos(nodo)],
+        }
+
+    def respuesta(self, parametros):
+        """
+        Regresa el JSON de la consulta, desde la caché si es posible.
+        """
+
+        llave = self.llave(parametros)
+        cuerpo = self.cache.get(llave)
+
+        if cuerpo is not None:
+            self.cache.move_to_end(llave)
+            return cuerpo
+
+        cuerpo = json.dumps(self.consultar(parametros), ensure_ascii=False).encode(
+            "utf-8"
+        )
+
+        self.guardar(llave, cuerpo)
+
+        return cuerpo
+
+    def guardar(self, llave, cuerpo):
+        """
+        Guarda un resultado y quita los que tienen más tiempo sin usarse.
+        """
+
+        self.cache[llave] = cuerpo
+        self.cache.move_to_end(llave)
+
+        while len(self.cache) > self.limite:
+            self.cache.popitem(last=False)
+
+    async def respuesta_async(self, parametros):
+        """
+        Igual que respuesta(), pero los cálculos se hacen en otro hilo para no
+        bloquear el servidor. Si la misma consulta ya se está calculando,
+        se espera ese resultado en lugar de calcularla otra vez.
+        """
+
+        llave = self.llave(parametros)
+        cuerpo = self.cache.get(llave)
+
+        if cuerpo is not None:
+            self.cache.move_to_end(llave)
+            return cuerpo
+
+        futuro = self.en_curso.get(llave)
+
+        if futuro is None:
+            loop = asyncio.get_running_loop()
+            futuro = loop.run_in_executor(None, self.consultar, parametros)
+            self.en_curso[llave] = futuro
+
+            try:
+                resultado = await futuro
+            finally:
+                del self.en_curso[llave]
+
+            cuerpo = json.dumps(resultado, ensure_ascii=False).encode("utf-8")
+            self.guardar(llave, cuerpo)
+
+            return cuerpo
+
+        await futuro
+
+        return self.cache.get(llave) or await self.respuesta_async(parametros)
+
+
+class Servidor:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio con conexiones persistentes.
+
+    Parameters
+    ==========
+    servicio : ServicioTotales
+        El servicio que calcula las respuestas.
+
+    """
+
+    def __init__(self, servicio):
+        self.servicio = servicio
+
+    async def rutear(self, metodo, objetivo):
+        """
+        Regresa el estado y el cuerpo JSON de la petición especificada.
+        """
+
+        if metodo != "GET":
+            return 405, {"error": f"Método no soportado: {metodo}"}
+
+        url = urlsplit(objetivo)
+        parametros = parse_qs(url.query)
+
+        if url.path == "/salud":
+            return 200, {"estado": "ok", "cache": len(self.servicio.cache)}
+
+        if url.path not in ("/totales", "/arbol"):
+            return 404, {"error": f"Ruta no encontrada: {url.path}"}
+
+        try:
+            # Buscar el nodo puede cargar el índice del archivo,
+            # así que también se hace en otro hilo.
+            if url.path == "/arbol":
+                loop = asyncio.get_running_loop()
+
+                return 200, await loop.run_in_executor(
+                    None, self.servicio.consultar_arbol, parametros
+                )
+
+            return 200, await self.servicio.respuesta_async(parametros)
+        except (ValueError, KeyError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": repr(e)}
+
+    async def atender(self, lector, escritor):
+        """
+        Atiende las peticiones de una conexión hasta que el cliente la cierre.
+        """
+
+        try:
+            while True:
+                linea = await lector.readline()
+
+                if not linea:
+                    break
+
+                try:
+                    metodo, objetivo, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self.escribir(
+                        escritor, 400, {"error": "Petición no válida."}, True
+                    )
+                    break
+
+                encabezados = dict()
+
+                while True:
+                    linea = await lector.readline()
+
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                # Las peticiones GET no usan el cuerpo, solo lo descartamos.
+                longitud = int(encabezados.get("content-length", 0) or 0)
+
+                if longitud:
+                    await lector.readexactly(longitud)
+
+                conexion = encabezados.get("connection", "").lower()
+                cerrar = conexion == "close" or (
+                    version == "HTTP/1.0" and conexion != "keep-alive"
+                )
+
+                estado, cuerpo = await self.rutear(metodo, objetivo)
+                await self.escribir(escritor, estado, cuerpo, cerrar)
+
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def escribir(self, escritor, estado, cuerpo, cerrar):
+        """
+        Escribe la respuesta HTTP con el cuerpo JSON especificado.
+        """
+
+        if not isinstance(cuerpo, bytes):
+            cuerpo = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+
+        encabezado = (
+            f"HTTP/1.1 {estado} {ESTADOS[estado]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'close' if cerrar else 'keep-alive'}\r\n"
+            "\r\n"
+        )
+
+        escritor.write(encabezado.encode("latin-1") + cuerpo)
+        await escritor.drain()
+
+    async def servir(self, host, puerto):
+        """
+        Inicia el servidor y atiende conexiones hasta que se detenga.
+        """
+
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+
+        for socket in servidor.sockets:
+            print("Escuchando:", socket.getsockname())
+
+        async with servidor:
+            await servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Servidor local de consultas de Cuenta Pública."
+    )
+
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="La dirección donde escucha el servidor.",
+    )
+
+    parser.add_argument(
+        "--puerto",
+        "--port",
+        type=int,
+        default=8000,
+        help="El puerto donde escucha el servidor.",
+    )
+
+    parser.add_argument(
+        "--limite",
+        type=int,
+        default=LIMITE,
+        help="El número máximo de resultados en la caché.",
+    )
+
+    args = parser.parse_args()
+
+    servicio = ServicioTotales(limite=args.limite)
+
+    # Cargamos el dataset y el índice de la jerarquía antes de aceptar conexiones.
+    servicio.respuesta({})
+
+    if os.path.exists(servicio.ruta_arbol):
+        cargar_arbol(servicio.ruta_arbol)
+
+    try:
+        asyncio.run(Servidor(servicio).servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,660 @@
+"""
+Este script genera archivos XLS sintéticos con el mismo formato
+que los archivos de Cuenta Pública, para probar converter.py
+con más filas y más años de los que tenemos disponibles.
+
+Se respetan los dos formatos:
+
+- Antiguo (2013 y 2014): los datos empiezan en la fila 13.
+- Nuevo (2015 en adelante): los datos empiezan en la fila 9, se agrega
+  la columna de SUBRAMO y desde 2016 la de pensiones y jubilaciones.
+
+Al igual que en los archivos originales, las etiquetas de ente, ramo
+y programa solo aparecen en su primera fila y cada partida tiene
+seis filas de PRESUPUESTO (cuatro etapas y dos porcentajes).
+
+Ejemplo:
+
+    python synthetic.py --ciclos 22 --filas 60000 --carpeta ./xls_sintetico
+
+Con --verificar los archivos generados se convierten y compilan
+en una carpeta temporal y se revisan con checker.py.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+import xlwt
+
+import checker
+import converter
+
+# El número máximo de filas de una hoja en formato XLS.
+FILAS_MAXIMAS = 65536
+
+ETAPAS = ["Aprobado", "Modificado", "Devengado", "Ejercicio"]
+
+PORCENTAJES = ["Porcentaje Ejer/Aprob", "Porcentaje Ejer/Modif"]
+
+# Los entes cuyos ramos se escriben en la columna de SUBRAMO
+# en el nuevo formato (converter.py los regresa a la columna de RAMO).
+ENTES_SUBRAMO = ["Poder Legislativo", "Poder Judicial"]
+
+ENTES_RAMO = ["Órganos Autónomos"]
+
+# En el Poder Ejecutivo los ramos se agrupan en estas categorías.
+GRUPOS_EJECUTIVO = ["Ramos Administrativos", "Ramos Generales"]
+
+MODALIDADES = "EKMOPRSU"
+
+# La proporción de las filas que ocupa cada ente que no es del Poder Ejecutivo.
+PROPORCION_ENTE = 0.05
+
+
+def formato_ciclo(ciclo):
+    """
+    Regresa el formato del ciclo: antiguo o nuevo.
+    """
+
+    return "antiguo" if ciclo <= 2014 else "nuevo"
+
+
+def columnas_montos(ciclo):
+    """
+    Regresa los nombres de los montos del ciclo sin las sumas,
+    en el orden de las columnas del archivo XLS.
+    """
+
+    corriente = ["GC_1", "GC_2", "GC_3", "GC_4"]
+    inversion = ["GI_1", "GI_2", "GI_3"]
+
+    if ciclo >= 2016:
+        return corriente + ["PENSIONES"] + inversion
+
+    return corriente + inversion
+
+
+class Generador:
+    """
+    Genera las filas de un archivo XLS sintético.
+
+    Parameters
+    ==========
+    ciclo : int
+        El año del archivo.
+
+    filas : int
+        El número aproximado de filas del archivo.
+
+    semilla : int
+        La semilla de los números aleatorios, con la misma semilla
+        se genera el mismo archivo.
+
+    """
+
+    def __init__(self, ciclo, filas, semilla=0):
+        self.ciclo = ciclo
+        self.formato = formato_ciclo(ciclo)
+        self.pensiones = ciclo >= 2016
+        # Dejamos espacio para el último ente, el cual se agrega completo.
+        self.filas_objetivo = min(filas, FILAS_MAXIMAS - 1000)
+        self.aleatorio = random.Random(f"{semilla}-{ciclo}")
+
+        # Los montos incluyen las dos sumas y el total,
+        # después siguen las columnas de la estructura porcentual.
+        self.n_montos = len(columnas_montos(ciclo)) + 3
+        self.n_estructura = 3 if self.pensiones else 2
+
+        # La columna donde empiezan los montos.
+        self.col_montos = 6 if self.formato == "antiguo" else 7
+        self.ncols = self.col_montos + self.n_montos + self.n_estructura
+
+        self.filas = list()
+
+    def fila(self, **celdas):
+        """
+        Agrega una fila con las celdas especificadas por índice de columna.
+        """
+
+        valores = [""] * self.ncols
+
+        for columna, valor in celdas.items():
+            valores[int(columna[1:])] = valor
+
+        self.filas.append(valores)
+
+    def cabecera(self):
+        """
+        Agrega las filas de título y de nombres de columnas.
+        """
+
+        self.fila()
+        self.fila(c1=f"CUENTA PÚBLICA {self.ciclo}")
+        self.fila(c1="GASTO POR CATEGORÍA PROGRAMÁTICA1/")
+        self.fila(c1="GOBIERNO FEDERAL")
+        self.fila(c1="(PESOS)")
+        self.fila()
+
+        if self.formato == "antiguo":
+            self.fila(
+                c1="Ente / Ramo",
+                c3="Programa",
+                c4="DENOMINACIÓN",
+                c6="G A S T O    C O R R I E N T E",
+                c11="G A S T O   D E   I N V E R S I Ó N",
+                c15="TOTAL",
+            )
+            self.fila()
+            self.fila(
+                c6="Servicios Personales",
+                c7="Gasto de Operación",
+                c8="Subsidios",
+                c9="Otros de Corriente",
+                c10="Suma",
+                c11="Inversión Física",
+                c12="Subsidios",
+                c13="Otros de Inversión",
+                c14="Suma",
+                c15="Total",
+                c16="Estructura",
+            )
+            self.fila(c16="Porcentual")
+            self.fila(c16="Corriente", c17="Inversión")
+            self.fila()
+            self.fila()
+        else:
+            columnas = [
+                "SERVICIOS PERSONALES",
+                "GASTO DE OPERACIÓN",
+                "SUBSIDIOS",
+                "OTROS DE CORRIENTE",
+                "SUMA",
+            ]
+
+            if self.pensiones:
+                columnas.append("")
+
+            columnas += [
+                "INVERSIÓN FÍSICA",
+                "SUBSIDIOS",
+                "OTROS DE INVERSIÓN",
+                "SUMA",
+                "TOTAL",
+                "ESTRUCTURA PORCENTUAL",
+            ]
+
+            inversion = 7 + columnas.index("INVERSIÓN FÍSICA")
+
+            self.fila(
+                c1="ENTE / RAMO",
+                c5="PROGRAMA",
+                c6="DENOMINACIÓN2/",
+                c7="GASTO CORRIENTE",
+                **({"c12": "PENSIONES Y JUBILACIONES"} if self.pensiones else {}),
+                **{f"c{inversion}": "GASTO DE INVERSIÓN"},
+                **{f"c{inversion + 4}": "TOTAL"},
+            )
+
+            self.fila(**{f"c{7 + i}": nombre for i, nombre in enumerate(columnas)})
+
+            estructura = ["CORRIENTE", "INVERSIÓN"]
+
+            if self.pensiones:
+                estructura.insert(1, "PENSIONES Y JUBILACIONES")
+
+            inicio = self.ncols - len(estructura)
+            self.fila(
+                **{f"c{inicio + i}": nombre for i, nombre in enumerate(estructura)}
+            )
+
+    def pie(self):
+        """
+        Agrega las notas del final del archivo. La última fila no se lee.
+        """
+
+        self.fila()
+        self.fila(
+            c1="1/ Las sumas parciales y total pueden no coincidir debido al redondeo."
+        )
+        self.fila(c1="2/ El concepto de Ejercicio incluye presupuesto pagado y ADEFAS.")
+        self.fila(c1="Fuente: Archivo sintético generado por synthetic.py")
+
+    def montos_partida(self):
+        """
+        Genera los montos de las cuatro etapas de una partida.
+
+        Returns
+        =======
+        list
+            Una lista de montos por etapa, en el orden de ETAPAS.
+
+        """
+
+        etapas = [list() for _ in ETAPAS]
+
+        for _ in columnas_montos(self.ciclo):
+            # Muchas partidas no tienen monto en todas las columnas.
+            if self.aleatorio.random() < 0.45:
+                aprobado = 0.0
+            else:
+                aprobado = round(self.aleatorio.lognormvariate(16, 2.5), 2)
+
+            modificado = round(aprobado * self.aleatorio.uniform(0.6, 1.4), 2)
+
+            # En ocasiones se asignan recursos que no estaban aprobados.
+            if aprobado == 0 and self.aleatorio.random() < 0.05:
+                modificado = round(self.aleatorio.lognormvariate(14, 2), 2)
+
+            devengado = round(modificado * self.aleatorio.uniform(0.85, 1.0), 2)
+            ejercicio = round(devengado * self.aleatorio.uniform(0.98, 1.0), 2)
+
+            for etapa, monto in zip(
+                etapas, [aprobado, modificado, devengado, ejercicio]
+            ):
+                etapa.append(monto)
+
+        return etapas
+
+    def columnas_completas(self, montos):
+        """
+        Agrega las sumas, el total y la estructura porcentual a los montos de una etapa.
+        """
+
+        corriente = montos[:4]
+        pensiones = montos[4:5] if self.pensiones else []
+        inversion = montos[-3:]
+
+        suma_corriente = round(sum(corriente), 2)
+        suma_inversion = round(sum(inversion), 2)
+        total = round(suma_corriente + sum(pensiones) + suma_inversion, 2)
+
+        valores = corriente + [suma_corriente] + pensiones + inversion
+        valores += [suma_inversion, total]
+
+        estructura = [suma_corriente] + pensiones + [suma_inversion]
+
+        if total:
+            valores += [monto / total * 100 for monto in estructura]
+        else:
+            valores += [0.0] * len(estructura)
+
+        return valores
+
+    def celdas_montos(self, valores):
+        """
+        Convierte los valores en celdas, empezando en la columna de montos.
+        En el antiguo formato algunas celdas en cero se dejan vacías.
+        """
+
+        celdas = dict()
+
+        for i, valor in enumerate(valores):
+            if (
+                self.formato == "antiguo"
+                and valor == 0
+                and self.aleatorio.random() < 0.5
+            ):
+                continue
+
+            celdas[f"c{self.col_montos + i}"] = valor
+
+        return celdas
+
+    def porcentaje(self, numerador, denominador):
+        """
+        Calcula el porcentaje como en los archivos originales:
+        vacío si el denominador es 0 y n.s. si es mayor a 500%.
+        """
+
+        if not denominador:
+            return " "
+
+        porcentaje = numerador / denominador * 100
+
+        if porcentaje > 500:
+            return "n.s."
+
+        return porcentaje
+
+    def bloque(self, etiqueta, montos):
+        """
+        Agrega la fila de etiqueta y las seis filas de PRESUPUESTO de una partida.
+
+        Parameters
+        ==========
+        etiqueta : dict
+            Las celdas de la fila de etiqueta.
+
+        montos : list
+            Los montos de cada etapa, ver montos_partida().
+
+        """
+
+        ceros = dict()
+
+        if self.formato == "nuevo":
+            # En el nuevo formato las filas de etiqueta tienen ceros en los montos.
+            ceros = {f"c{self.col_montos + i}": 0.0 for i in range(self.n_montos)}
+
+        self.fila(**ceros, **etiqueta)
+
+        completas = [self.columnas_completas(etapa) for etapa in montos]
+
+        # Columna de la denominación (donde va el tipo de presupuesto).
+        columna = "c4" if self.formato == "antiguo" else "c6"
+
+        for nombre, valores in zip(ETAPAS, completas):
+            self.fila(**{columna: nombre}, **self.celdas_montos(valores))
+
+        aprobado, modificado, _, ejercicio = completas
+
+        # Los porcentajes no incluyen la estructura porcentual.
+        for nombre, base in zip(PORCENTAJES, [aprobado, modificado]):
+            valores = [
+                self.porcentaje(e, b)
+                for e, b in zip(ejercicio[: self.n_montos], base[: self.n_montos])
+            ]
+
+            celdas = {
+                f"c{self.col_montos + i}": valor for i, valor in enumerate(valores)
+            }
+
+            self.fila(**{columna: nombre}, **celdas)
+
+    def sumar(self, partidas):
+        """
+        Suma los montos de varias partidas, etapa por etapa.
+        """
+
+        return [
+            [round(sum(valores), 2) for valores in zip(*etapas)]
+            for etapas in zip(*partidas)
+        ]
+
+    def programas(self, ramo):
+        """
+        Genera los montos de los programas de un ramo.
+        El número de programas depende del número de filas objetivo.
+        """
+
+        cantidad = self.aleatorio.randint(3, 40)
+
+        return [
+            (
+                f"{self.aleatorio.choice(MODALIDADES)}{i + 1:03d}",
+                f"Programa sintético {i + 1} del ramo {ramo}",
+                self.montos_partida(),
+            )
+            for i in range(cantidad)
+        ]
+
+    def etiqueta(self, nivel, texto):
+        """
+        Regresa las celdas de la etiqueta según su nivel y el formato.
+
+        Los niveles son: ente, ramo, subramo, programa.
+        """
+
+        if self.formato == "antiguo":
+            columnas = {"ente": 1, "ramo": 2, "subramo": 2, "programa": 3}
+        else:
+            columnas = {"ente": 2, "ramo": 3, "subramo": 4, "programa": 5}
+
+        return {f"c{columnas[nivel]}": texto}
+
+    def ramo(self, nombre, nivel):
+        """
+        Agrega un ramo con sus totales y sus programas.
+        """
+
+        programas = self.programas(nombre)
+        total = self.sumar([montos for _, _, montos in programas])
+
+        self.bloque(self.etiqueta(nivel, nombre), total)
+
+        for clave, descripcion, montos in programas:
+            denominacion = "c4" if self.formato == "antiguo" else "c6"
+            self.bloque(
+                {**self.etiqueta("programa", clave), denominacion: descripcion}, montos
+            )
+
+        return total
+
+    def generar(self):
+        """
+        Genera todas las filas del archivo.
+
+        Cada ente y cada grupo del Poder Ejecutivo aparece una sola vez
+        y en el mismo orden que en los archivos originales. Para llegar
+        al número de filas objetivo se agregan más ramos dentro de cada uno.
+
+        Returns
+        =======
+        list
+            Las filas con sus valores.
+
+        """
+
+        self.filas = list()
+        self.cabecera()
+
+        inicio = len(self.filas)
+        restantes = self.filas_objetivo - inicio
+
+        numero_ramo = 0
+
+        # Los poderes y órganos autónomos se escriben como en los archivos originales.
+        for ente in ENTES_SUBRAMO + ENTES_RAMO:
+            nivel = "subramo" if ente in ENTES_SUBRAMO else "ramo"
+            limite = len(self.filas) + restantes * PROPORCION_ENTE
+
+            numero_ramo = self.ente(ente, nivel, numero_ramo, limite)
+
+        # En el Poder Ejecutivo los ramos van dentro de un grupo.
+        self.fila(**self.etiqueta("ente", "Poder Ejecutivo"))
+
+        # El primer grupo llega a la mitad de las filas restantes
+        # y el último hasta el número de filas objetivo.
+        limites = [
+            len(self.filas) + (self.filas_objetivo - len(self.filas)) / 2,
+            self.filas_objetivo,
+        ]
+
+        for grupo, limite in zip(GRUPOS_EJECUTIVO, limites):
+            if self.formato == "antiguo":
+                self.fila(**self.etiqueta("ente", grupo))
+            else:
+                self.fila(**self.etiqueta("ramo", grupo))
+
+            while True:
+                numero_ramo += 1
+                self.ramo(f"Ramo {numero_ramo:03d}", "subramo")
+
+                if len(self.filas) >= limite:
+                    break
+
+        self.pie()
+
+        return self.filas
+
+    def ente(self, nombre, nivel, numero_ramo, limite):
+        """
+        Agrega un ente que no es del Poder Ejecutivo con al menos un ramo
+        y tantos como quepan hasta la fila límite.
+        En el nuevo formato el ente también tiene sus totales.
+
+        Regresa el número del último ramo agregado.
+        """
+
+        inicio = len(self.filas)
+
+        self.fila(**self.etiqueta("ente", nombre))
+
+        totales = list()
+
+        while not totales or len(self.filas) < limite:
+            numero_ramo += 1
+            totales.append(self.ramo(f"Ramo {numero_ramo:03d}", nivel))
+
+        if self.formato == "nuevo":
+            # Reemplazamos la fila de etiqueta por el bloque con los totales del ente.
+            ramos = self.filas[inicio + 1 :]
+            del self.filas[inicio:]
+
+            self.bloque(self.etiqueta("ente", nombre), self.sumar(totales))
+            self.filas.extend(ramos)
+
+        return numero_ramo
+
+
+def guardar_libro(filas, ruta):
+    """
+    Guarda las filas en la primera hoja de un archivo XLS.
+    Las celdas vacías no se escriben, igual que en los archivos originales.
+    """
+
+    libro = xlwt.Workbook(encoding="utf-8")
+    hoja = libro.add_sheet("Hoja1")
+
+    for i, fila in enumerate(filas):
+        for j, valor in enumerate(fila):
+            if valor != "":
+                hoja.write(i, j, valor)
+
+    libro.save(ruta)
+
+
+def generar_archivos(ciclos, filas, carpeta="./xls_sintetico", desde=2013, semilla=0):
+    """
+    Genera los archivos XLS sintéticos de varios ciclos.
+
+    Parameters
+    ==========
+    ciclos : int
+        El número de años a generar.
+
+    filas : int
+        El número aproximado de filas de cada archivo.
+        El máximo es de 65,536 filas por archivo (límite del formato XLS),
+        para más filas se deben generar más años.
+
+    carpeta : str
+        La carpeta donde se guardan los archivos, con el nombre {ciclo}.xls
+
+    desde : int
+        El primer año. Los años 2013 y 2014 usan el antiguo formato.
+
+    semilla : int
+        La semilla de los números aleatorios.
+
+    Returns
+    =======
+    list
+        Las rutas de los archivos generados.
+
+    """
+
+    os.makedirs(carpeta, exist_ok=True)
+
+    rutas = list()
+
+    for ciclo in range(desde, desde + ciclos):
+        ruta = os.path.join(carpeta, f"{ciclo}.xls")
+
+        guardar_libro(Generador(ciclo, filas, semilla).generar(), ruta)
+
+        rutas.append(ruta)
+        print("Generado:", ruta)
+
+    return rutas
+
+
+def verificar_archivos(carpeta="./xls_sintetico"):
+    """
+    Convierte y compila los archivos XLS sintéticos en una carpeta temporal
+    y revisa los resultados con checker.py.
+
+    Así se confirma que los archivos generados pasan por el mismo proceso
+    que los originales sin modificar los archivos del repositorio.
+
+    Returns
+    =======
+    pandas.DataFrame
+        El reporte de checker.verificar(), vacío si no hay diferencias.
+
+    """
+
+    carpeta = os.path.abspath(carpeta)
+    directorio_original = os.getcwd()
+
+    ciclos = sorted(
+        int(archivo[:-4])
+        for archivo in os.listdir(carpeta)
+        if archivo.endswith(".xls") and archivo[:-4].isdigit()
+    )
+
+    with tempfile.TemporaryDirectory() as temporal:
+        os.symlink(carpeta, os.path.join(temporal, "xls"))
+        os.makedirs(os.path.join(temporal, "csv"))
+        os.chdir(temporal)
+
+        try:
+            for ciclo in ciclos:
+                converter.convertir_ciclo(ciclo)
+
+            converter.compilar(["data.csv", "data_total.csv"])
+
+            return checker.verificar()
+        finally:
+            os.chdir(directorio_original)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Genera archivos XLS sintéticos de Cuenta Pública."
+    )
+
+    parser.add_argument(
+        "--ciclos", type=int, default=11, help="Número de años a generar."
+    )
+
+    parser.add_argument(
+        "--desde", type=int, default=2013, help="El primer año a generar."
+    )
+
+    parser.add_argument(
+        "--filas",
+        type=int,
+        default=6000,
+        help=f"Número aproximado de filas por archivo (máximo {FILAS_MAXIMAS:,}).",
+    )
+
+    parser.add_argument(
+        "--carpeta",
+        default="./xls_sintetico",
+        help="La carpeta donde se guardan los archivos.",
+    )
+
+    parser.add_argument(
+        "--semilla", type=int, default=0, help="La semilla de los números aleatorios."
+    )
+
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        help="Convierte los archivos generados y los revisa con checker.py.",
+    )
+
+    args = parser.parse_args()
+
+    generar_archivos(args.ciclos, args.filas, args.carpeta, args.desde, args.semilla)
+
+    if args.verificar:
+        reporte = verificar_archivos(args.carpeta)
+        checker.resumir(reporte)
+
+        if not reporte.empty:
+            sys.exit(1)
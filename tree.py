@@ -0,0 +1,306 @@
+"""
+Este script crea un índice con la jerarquía de Cuenta Pública
+y los totales precalculados de cada nodo.
+
+Se crea un árbol por cada CICLO y PRESUPUESTO con los niveles:
+TOTAL > ENTE > RAMO > PROGRAMA
+
+Cada nodo guarda su padre, el rango de sus hijos y la suma de cada
+medida de todos los programas debajo de él. Los nodos de cada nivel
+están ordenados por sus ancestros, así los hijos de un nodo siempre
+son filas consecutivas.
+
+Por ejemplo, para recorrer los ramos del Poder Judicial en 2022:
+
+    arbol = cargar_arbol()
+    nodo = arbol.nodo(2022, "Aprobado", ente="Poder Judicial")
+
+    for hijo in arbol.hijos(nodo):
+        print(arbol.nombre(hijo), arbol.total(hijo))
+
+Las sumas se calculan en centavos enteros, igual que en cube.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+from loader import cargar
+from schema import MONTOS, SUMAS, a_centavos, a_pesos
+
+ARBOLES = ["CICLO", "PRESUPUESTO"]
+
+NIVELES = ["ENTE", "RAMO", "PROGRAMA"]
+
+ESTRUCTURA = ["NODO", "PADRE", "NIVEL", "HIJOS_INICIO", "HIJOS_FIN"]
+
+ETIQUETAS = ARBOLES + NIVELES + ["DESCRIPCIÓN"]
+
+
+def construir_arbol(df):
+    """
+    Calcula los nodos de la jerarquía y sus totales.
+
+    Parameters
+    ==========
+    df : pandas.DataFrame
+        El DataFrame con el formato de data.csv
+
+    Returns
+    =======
+    pandas.DataFrame
+        Una fila por nodo. La raíz de cada árbol tiene PADRE -1 y
+        los hijos de cada nodo son las filas HIJOS_INICIO:HIJOS_FIN.
+
+    """
+
+    guardadas = [columna for columna in MONTOS if columna in df.columns]
+
+    medidas = [
+        columna for columna in MONTOS if columna in guardadas or columna in SUMAS
+    ]
+
+    df = (
+        a_centavos(df[ETIQUETAS + guardadas])
+        .derivadas.agregar(*[suma for suma in SUMAS if suma not in guardadas])[
+            ETIQUETAS + medidas
+        ]
+        .fillna({medida: 0 for medida in medidas})
+        .astype({medida: "int64" for medida in medidas})
+    )
+
+    partes = list()
+
+    for nivel in range(len(NIVELES) + 1):
+        grupo = ARBOLES + NIVELES[:nivel]
+
+        # La descripción solo depende de la clave del programa.
+        if nivel == len(NIVELES):
+            grupo = grupo + ["DESCRIPCIÓN"]
+
+        parte = df.groupby(grupo, observed=True)[medidas].sum().reset_index()
+
+        for columna in ETIQUETAS[1:]:
+            if columna in grupo:
+                parte[columna] = parte[columna].astype(str)
+            else:
+                parte[columna] = ""
+
+        parte["NIVEL"] = nivel
+        partes.append(parte)
+
+    # Al ordenar primero por nivel y después por los ancestros,
+    # los hijos de cada nodo quedan juntos.
+    arbol = pd.concat(partes, ignore_index=True).sort_values(
+        ARBOLES + ["NIVEL"] + NIVELES, ignore_index=True
+    )
+
+    arbol["NODO"] = np.arange(len(arbol))
+    arbol["PADRE"] = -1
+
+    for nivel in range(1, len(NIVELES) + 1):
+        llave = ARBOLES + NIVELES[: nivel - 1]
+
+        hijos = arbol["NIVEL"] == nivel
+        padres = arbol.loc[arbol["NIVEL"] == nivel - 1, llave + ["NODO"]]
+
+        arbol.loc[hijos, "PADRE"] = (
+            arbol.loc[hijos, llave].merge(padres, on=llave, how="left")["NODO"].values
+        )
+
+    rangos = arbol[arbol["PADRE"] >= 0].groupby("PADRE")["NODO"].agg(["min", "max"])
+
+    # Las hojas tienen un rango vacío.
+    arbol["HIJOS_INICIO"] = arbol["NODO"].map(rangos["min"]).fillna(0).astype("int64")
+    arbol["HIJOS_FIN"] = arbol["NODO"].map(rangos["max"] + 1).fillna(0).astype("int64")
+
+    return a_pesos(arbol[ESTRUCTURA + ETIQUETAS + medidas])
+
+
+class Arbol:
+    """
+    Recorre la jerarquía usando el índice precalculado.
+
+    Buscar un nodo, su padre o su total no depende del número de filas,
+    y obtener los hijos de un nodo solo depende de cuántos hijos tiene.
+    """
+
+    def __init__(self, arbol):
+        medidas = [columna for columna in arbol.columns if columna in MONTOS]
+
+        self.nodos = arbol
+        self.medidas = {medida: j for j, medida in enumerate(medidas)}
+        self.valores = arbol[medidas].to_numpy(dtype="float64")
+
+        self.padres = arbol["PADRE"].to_numpy()
+        self.niveles = arbol["NIVEL"].to_numpy()
+        self.inicios = arbol["HIJOS_INICIO"].to_numpy()
+        self.fines = arbol["HIJOS_FIN"].to_numpy()
+
+        self.etiquetas = {
+            columna: arbol[columna].astype(str).tolist() for columna in ETIQUETAS
+        }
+
+        llaves = zip(*(self.etiquetas[columna] for columna in ARBOLES + NIVELES))
+        self.indice = {llave: i for i, llave in enumerate(llaves)}
+
+    def nodo(self, ciclo, presupuesto, ente=None, ramo=None, programa=None):
+        """
+        Regresa el número del nodo especificado.
+
+        Si solo se especifican el ciclo y el presupuesto se regresa la raíz
+        de ese árbol. Los niveles se deben especificar en orden.
+
+        Parameters
+        ==========
+        ciclo : int
+            El año fiscal.
+
+        presupuesto : str
+            La etapa del presupuesto, por ejemplo: Aprobado.
+
+        ente : str
+            El ente, por ejemplo: Poder Judicial.
+
+        ramo : str
+            El ramo, por ejemplo: Bienestar.
+
+        programa : str
+            La clave del programa, por ejemplo: K027.
+
+        """
+
+        niveles = [ente, ramo, programa]
+
+        while niveles and niveles[-1] is None:
+            niveles.pop()
+
+        if None in niveles:
+            raise ValueError("Los niveles del nodo se deben especificar en orden.")
+
+        llave = tuple(str(valor) for valor in [ciclo, presupuesto] + niveles)
+        llave += ("",) * (len(ARBOLES) + len(NIVELES) - len(llave))
+
+        i = self.indice.get(llave)
+
+        if i is None:
+            raise KeyError(f"Nodo no encontrado: {' > '.join(llave).strip(' >')}")
+
+        return i
+
+    def padre(self, nodo):
+        """
+        Regresa el padre del nodo, o None si es la raíz.
+        """
+
+        padre = int(self.padres[nodo])
+
+        return None if padre < 0 else padre
+
+    def hijos(self, nodo):
+        """
+        Regresa los números de los hijos del nodo.
+        """
+
+        return range(self.inicios[nodo], self.fines[nodo])
+
+    def ancestros(self, nodo):
+        """
+        Regresa los ancestros del nodo, desde su padre hasta la raíz.
+        """
+
+        ancestros = list()
+        padre = self.padre(nodo)
+
+        while padre is not None:
+            ancestros.append(padre)
+            padre = self.padre(padre)
+
+        return ancestros
+
+    def total(self, nodo, medida="TOTAL"):
+        """
+        Regresa la suma de la medida de todos los programas debajo del nodo.
+        """
+
+        return self.valores[nodo, self.medidas[medida]]
+
+    def nombre(self, nodo):
+        """
+        Regresa la etiqueta del nivel del nodo, por ejemplo:
+        el nombre del ramo o la clave del programa.
+        La raíz se nombra por su ciclo y presupuesto.
+        """
+
+        nivel = self.niveles[nodo]
+
+        if nivel == 0:
+            return " ".join(self.etiquetas[columna][nodo] for columna in ARBOLES)
+
+        return self.etiquetas[NIVELES[nivel - 1]][nodo]
+
+    def datos(self, nodo, medidas=("TOTAL",)):
+        """
+        Regresa las etiquetas, la posición y las medidas especificadas del nodo.
+        """
+
+        datos = {
+            "NODO": int(nodo),
+            "PADRE": self.padre(nodo),
+            "NIVEL": int(self.niveles[nodo]),
+            "HIJOS": len(self.hijos(nodo)),
+        }
+
+        for columna in ETIQUETAS:
+            valor = self.etiquetas[columna][nodo]
+            datos[columna] = int(valor) if columna == "CICLO" else valor or None
+
+        for medida in medidas:
+            valor = self.total(nodo, medida)
+            datos[medida] = None if np.isnan(valor) else float(valor)
+
+        return datos
+
+    def desglose(self, nodo):
+        """
+        Regresa las filas de los hijos del nodo, por ejemplo para una gráfica treemap.
+        """
+
+        return self.nodos.iloc[self.inicios[nodo] : self.fines[nodo]]
+
+
+def guardar_arbol(df, ruta):
+    """
+    Calcula y guarda el índice de la jerarquía del DataFrame especificado.
+    Regresa el número de nodos.
+    """
+
+    arbol = construir_arbol(df)
+    arbol.to_csv(ruta, index=False, encoding="utf-8")
+
+    return len(arbol)
+
+
+def leer_arbol(ruta):
+    """
+    Lee el índice guardado y regresa un objeto Arbol.
+    """
+
+    # Las etiquetas vacías de los niveles superiores se leen como texto vacío.
+    arbol = pd.read_csv(
+        ruta,
+        dtype={columna: str for columna in ETIQUETAS if columna != "CICLO"},
+        keep_default_na=False,
+        na_values={medida: [""] for medida in MONTOS},
+        float_precision="round_trip",
+    )
+
+    return Arbol(arbol)
+
+
+def cargar_arbol(ruta="./data_arbol.csv"):
+    """
+    Regresa el Arbol del archivo especificado usando la caché de loader.py,
+    así se crea una sola vez por archivo.
+    """
+
+    return cargar(ruta, lector=leer_arbol)